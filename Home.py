@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
+from utils import metrics as evaluation_metrics
 
 
 def set_page_config():
@@ -73,15 +74,26 @@ def main():
 
     # Content for the first column
     # with col1:
+    metrics = evaluation_metrics.load_metrics()
+    if metrics is None:
+        st.warning(
+            "⚠️ Hasil evaluasi belum tersedia. Jalankan `python -m utils.evaluation` untuk menghitungnya."
+        )
+        return
+
+    df, payload = metrics
+    prophet = df.set_index("Model").loc["Prophet"]
+    arima = df.set_index("Model").loc["ARIMA"]
+
     st.markdown(
         "Model forecasting menggunakan algoritma Prophet menghasilkan metrik evaluasi sebagai berikut:"
     )
 
-    st.markdown("- **RMSE (Root Mean Square Error)**: 1.66")
-    st.markdown("- **MAE (Mean Absolute Error)**: 1.26")
+    st.markdown(f"- **RMSE (Root Mean Square Error)**: {prophet['RMSE']:.2f}")
+    st.markdown(f"- **MAE (Mean Absolute Error)**: {prophet['MAE']:.2f}")
 
-    st.markdown(
-        "Hasil menunjukkan bahwa model memiliki akurasi yang baik dengan kesalahan prediksi yang relatif rendah."
+    st.caption(
+        f"Dihitung dengan rolling-origin backtest ({prophet['Folds']} fold) pada {payload['generated_at']}."
     )
 
     # Content for the second column
@@ -94,21 +106,11 @@ def main():
     # Set up the two columns layout with different widths
     st.header("🔍 Perbandingan Model ARIMA dan Prophet")
 
-    # Data evaluasi model
-    data = {
-        "Model": ["ARIMA", "Prophet"],
-        "RMSE": [3.19, 1.66],
-        "MAE": [2.14, 1.26],
-    }
-
-    # Membuat DataFrame
-    df = pd.DataFrame(data)
-
     col1, col2 = st.columns([3, 7])
 
     with col1:
         st.write("### Tabel Evaluasi Model")
-        st.dataframe(df)
+        st.dataframe(df[["Model", "RMSE", "MAE"]])
 
     with col2:
         st.image(
@@ -118,11 +120,15 @@ def main():
 
     # Kesimpulan
     st.write("### Kesimpulan")
+    if prophet["RMSE"] <= arima["RMSE"]:
+        best, other = ("Prophet", prophet), ("ARIMA", arima)
+    else:
+        best, other = ("ARIMA", arima), ("Prophet", prophet)
     st.markdown(
-        """
-        Hasil evaluasi menunjukkan bahwa model Prophet mengungguli model ARIMA dalam metrik RMSE dan MAE.
-        Prophet memiliki RMSE (1.66) dan MAE (1.26) yang lebih rendah dibandingkan dengan ARIMA, yang memiliki RMSE (3.19) dan MAE (2.14).
-        Hal ini menunjukkan bahwa model Prophet memberikan prediksi yang lebih akurat.
+        f"""
+        Hasil evaluasi menunjukkan bahwa model {best[0]} memiliki RMSE ({best[1]['RMSE']:.2f}) dan MAE ({best[1]['MAE']:.2f}),
+        dibandingkan dengan {other[0]} yang memiliki RMSE ({other[1]['RMSE']:.2f}) dan MAE ({other[1]['MAE']:.2f}).
+        Berdasarkan RMSE, model {best[0]} memberikan prediksi yang lebih akurat pada data uji.
         """
     )
 
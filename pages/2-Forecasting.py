@@ -1,12 +1,38 @@
 import streamlit as st
 import pandas as pd
-from utils import model, visualization, cek_optimization
+import numpy as np
+from utils import (
+    model,
+    visualization,
+    cek_optimization,
+    scenario,
+    optimizer,
+    session,
+    registry,
+    figure_cache,
+    anomaly,
+    validation,
+    index,
+    history,
+    store,
+    disk_cache,
+    surrogate,
+)
 import matplotlib.pyplot as plt
-import time
+import os
 import warnings
 
 # GLOBAL VARIABLE
 MAX_DAY = 40
+RESAMPLE_FREQ = "D"
+UNCERTAINTY_OPTIONS = [0, 100, 250, 500, 1000]
+UNCERTAINTY_SAMPLES = 1000
+UNCERTAINTY_SEED = 0
+HISTORY_DAYS = 30
+HISTORY_RUNS = 10
+EXAMPLE_CSV_PATH = "./dataset/dummy_data_test.csv"
+EXAMPLE_CSV_URL = "https://raw.githubusercontent.com/Vinzzztty/Forecasting-Hidroponik/main/dataset/dummy_data_test.csv"
+EXAMPLE_DATASET = "dummy_data_test"
 
 
 def set_page_config():
@@ -48,76 +74,118 @@ def render_sidebar():
         )
 
 
+@st.cache_resource
+def get_registry():
+    """Model registry shared by every session of this server process."""
+    return registry.ModelRegistry.from_file()
+
+
+@st.cache_resource
+def get_sensor_store():
+    """Datasets from ``python -m utils.store build``, mapped once per server process."""
+    if store.is_store(store.STORE_DIR):
+        try:
+            return store.SensorStore.open(store.STORE_DIR)
+        except (ValueError, KeyError, OSError):
+            # Written by an older version; the CSV files still work
+            return None
+    return None
+
+
+@st.cache_resource
+def get_surrogate(crop, site):
+    """Lookup table of a (crop, site) model from ``python -m utils.surrogate build``, if built."""
+    models_registry = get_registry()
+    return surrogate.load_surrogate(
+        models_registry.get(crop, site),
+        models_registry.version(crop, site),
+        models_registry.entry(crop, site)["cap"],
+    )
+
+
+def surrogate_key(entry):
+    """Identity of the lookup table a cached result was computed with, None without one."""
+    table = get_surrogate(entry["crop"], entry["site"])
+    if table is None:
+        return None
+    return session.content_hash(table.info, table.max_error)
+
+
+@st.cache_resource
+def get_forecast_history():
+    """Forecast history store shared by every session of this server process."""
+    return history.ForecastHistory()
+
+
+def select_model():
+    """Let the user pick a crop and site, return its model and registry entry."""
+    models_registry = get_registry()
+    keys = models_registry.keys()
+    with st.sidebar:
+        crop = st.selectbox("🌱 Tanaman", sorted({crop for crop, _ in keys}))
+        site = st.selectbox(
+            "🏠 Greenhouse", sorted(site for key_crop, site in keys if key_crop == crop)
+        )
+    return models_registry.get(crop, site), models_registry.entry(crop, site)
+
+
 def handle_file_upload(option):
-    """Handle CSV file upload or use example CSV."""
+    """Handle CSV file upload or use example CSV.
+
+    Returns the data and whether it was already validated, or (None, False).
+    """
     if option == "Unggah file CSV":
         uploaded_file = st.file_uploader(
             "Unggah file CSV untuk dilakukan prediksi", type=["csv"]
         )
         if uploaded_file is not None:
-            return pd.read_csv(uploaded_file)
+            return read_csv_checked(uploaded_file, uploaded_file.file_id), False
     elif option == "Gunakan contoh file CSV":
-        url_example = "https://raw.githubusercontent.com/Vinzzztty/Forecasting-Hidroponik/main/dataset/dummy_data_test.csv"
+        # Every server process on the host reads the same mapped copy, which
+        # was validated and sorted by time when the store was built
+        sensor_store = get_sensor_store()
+        if sensor_store is not None and EXAMPLE_DATASET in sensor_store.sites:
+            st.write("Menggunakan contoh data bawaan aplikasi")
+            return sensor_store.frame(EXAMPLE_DATASET), True
+        # The bundled copy keeps the example working offline
+        if os.path.exists(EXAMPLE_CSV_PATH):
+            st.write("Menggunakan contoh file CSV bawaan aplikasi")
+            return read_csv_checked(EXAMPLE_CSV_PATH, EXAMPLE_CSV_PATH), False
         st.write("Menggunakan contoh file CSV dari URL")
-        return pd.read_csv(url_example)
-    return None
+        return read_csv_checked(EXAMPLE_CSV_URL, EXAMPLE_CSV_URL), False
+    return None, False
+
+
+def read_csv_checked(source, source_key):
+    """Read the CSV once per source, stopping early on oversized files or missing columns."""
+    try:
+        return session.remember(
+            ("upload", source_key), lambda: validation.read_upload(source)
+        )
+    except validation.UploadError as e:
+        st.error(f"⚠️ {e}")
+        return None
 
 
 def preprocess_data(df):
-    """Preprocess the input data to ensure required columns are available and properly formatted."""
-    # check if 'datetime' column is not present
+    """Validate every row and make sure a proper 'datetime' column is available."""
     if "datetime" not in df.columns:
         st.info(
             "Kolom 'datetime' tidak ditemukan, akan membuat kolom 'datetime' dari kolom 'day' dan 'time' secara otomatis!."
         )
 
-        # Inisialisasi start_date
-        start_date = pd.to_datetime("2024-07-01")
-
-        # Ensure 'day' column exists and is of integer type
-        if "day" in df.columns:
-            df["day"] = df["day"].astype(int)
-        else:
-            st.error("Kolom 'day' tidak ditemukan pada file CSV.")
-
-        # Ensure 'time' column exists and format it properly
-        if "time" in df.columns:
-            df["time"] = df["time"].apply(lambda x: "{:.2f}".format(x))
-            df["time"] = pd.to_datetime(df["time"], format="%H.%M").dt.time
-
-            # Replace dots with colons for time formatting
-            df["time"] = df["time"].astype(str)
-
-            df["datetime"] = df.apply(
-                lambda row: start_date
-                + pd.Timedelta(days=row["day"] - 1)
-                + pd.to_timedelta(row["time"]),
-                axis=1,
-            )
-
-            df = df.drop_duplicates(subset=["day", "time", "LeafCount"])
-
-            df.set_index("datetime", inplace=True)
-            df = df.sort_index()
-
-        else:
-            st.error("Kolom 'time' tidak ditemukan pada file CSV.")
-            return None
-
-        df["datetime"] = df.apply(
-            lambda row: start_date
-            + pd.Timedelta(days=row["day"] - 1)
-            + pd.to_timedelta(row["time"]),
-            axis=1,
+    try:
+        df, report = session.remember(
+            ("validated", session.content_hash(df)),
+            lambda: validation.validate_frame(df),
         )
+    except validation.UploadError as e:
+        st.error(f"⚠️ {e}")
+        return None
 
-    # Convert 'datetime'column to datetime format if it's not already
-    if not pd.api.types.is_datetime64_any_dtype(df["datetime"]):
-        df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce")
-
-        if df["datetime"].isnull().any():
-            st.error("⚠️ Ada nilai yang tidak bisa dikonversi ke format datetime.")
-            return None
+    if len(report):
+        st.warning(f"⚠️ {len(report)} baris tidak valid dan tidak digunakan:")
+        st.dataframe(report, hide_index=True)
 
     important_columns = [
         "datetime",
@@ -134,32 +202,52 @@ def preprocess_data(df):
     return df[important_columns]
 
 
-def forecast_growth(df):
-    """Forecast the growth of leaves based on the model and user input."""
-    df_prophet = model.prepare_data(df)
-    models = model.load_model("./model/prophet_model.pkl")
+def screen_sensor_data(df):
+    """Handle sensor glitches before forecasting and report how many were found."""
+    actions = {
+        "Potong ke batas wajar": "clip",
+        "Hapus baris": "drop",
+        "Tandai saja": "flag",
+    }
+    with st.sidebar:
+        label = st.radio("🧹 Penanganan data anomali", list(actions))
+    action = actions[label]
+    df, report = disk_cache.remember(
+        ("screened", session.content_hash(df), action),
+        lambda: anomaly.screen_anomalies(df, action),
+    )
 
-    unique_days = df["datetime"].dt.date.nunique()
-    st.info(f"🗓️ Total hari setelah di Tanam: {unique_days} hari")
+    if report["anomalous_rows"]:
+        details = ", ".join(
+            f"{feature}: {count}"
+            for feature, count in report["per_feature"].items()
+            if count
+        )
+        st.warning(
+            f"🧹 {report['anomalous_rows']} dari {report['rows']} baris berisi "
+            f"pembacaan sensor anomali ({details})."
+        )
+    return df
 
-    with st.spinner(text="⏳ Sedang menganalisis..."):
-        time.sleep(2)
 
-    future = models.make_future_dataframe(periods=unique_days, freq="D")
-    for feature in [
-        "hole",
-        "temperature",
-        "humidity",
-        "light",
-        "pH",
-        "EC",
-        "TDS",
-        "WaterTemp",
-    ]:
-        future[feature] = df_prophet[feature].iloc[-1]
-    future["cap"] = 18
+def index_sensor_data(df):
+    """Sort the readings by hole and time once per dataset for range lookups."""
+    return session.remember(
+        ("sensor_index", session.content_hash(df)), lambda: index.SensorIndex(df)
+    )
+
+
+def forecast_growth(df, sensor_index, models, entry):
+    """Forecast the growth of leaves based on the model and user input."""
+    input_key = session.content_hash(df)
+    df_prophet = disk_cache.remember(
+        ("df_prophet", input_key, RESAMPLE_FREQ),
+        lambda: model.prepare_data(model.resample_data(df, RESAMPLE_FREQ)),
+    )
+
+    unique_days = sensor_index.n_dates
+    st.info(f"🗓️ Total hari setelah di Tanam: {unique_days} hari")
 
-    forecast = models.predict(future)
     max_periods = MAX_DAY - unique_days
     periods = st.slider(
         "⏳ Pilih hari untuk Forecasting pertumbuhan daun",
@@ -167,9 +255,26 @@ def forecast_growth(df):
         max_value=max_periods,
         step=1,
     )
-    future = model.create_future_dataframe(df_prophet, periods=periods)
-    future["cap"] = 18
-    forecast = model.make_predictions(models, future)
+    with st.sidebar:
+        samples = st.select_slider(
+            "🎲 Sampel interval ketidakpastian",
+            options=UNCERTAINTY_OPTIONS,
+            value=UNCERTAINTY_SAMPLES,
+            help="Lebih sedikit sampel = lebih cepat, 0 = tanpa interval.",
+        )
+    with st.spinner(text="⏳ Sedang menganalisis..."):
+        future = model.create_future_dataframe(df_prophet, periods=periods)
+        future["cap"] = entry["cap"]
+        forecast = session.remember(
+            ("forecast", input_key, entry["crop"], entry["site"], periods, samples),
+            lambda: predict_or_reuse(models, future, entry, input_key, samples),
+        )
+    table = get_surrogate(entry["crop"], entry["site"])
+    if table is not None and table.covers(future):
+        st.caption(
+            f"⚡ Dihitung dari tabel surrogate model "
+            f"(selisih maks. {table.error['max']:.3f} daun terhadap model Prophet)"
+        )
 
     st.markdown(""" --- """)
     st.markdown(f"### 📈 Hasil Forecasting untuk {periods} Hari Ke Depan")
@@ -178,7 +283,7 @@ def forecast_growth(df):
 
     col1, col2 = st.columns([6, 4])
     with col1:
-        periods = forecast["day"].max()
+        periods = (forecast["ds"].max() - forecast["ds"].min()).days + 1
         image_path = select_image_path(periods)
         st.markdown(
             f"""
@@ -196,6 +301,36 @@ def forecast_growth(df):
     return df_prophet, forecast
 
 
+def predict_or_reuse(models, future, entry, input_key, samples):
+    """Reuse the stored forecast of the same model and inputs, or compute and store it."""
+    table = get_surrogate(entry["crop"], entry["site"])
+    run = {
+        "crop": entry["crop"],
+        "site": entry["site"],
+        "model_version": get_registry().version(entry["crop"], entry["site"]),
+        "input_hash": input_key,
+        "samples": samples,
+        "seed": UNCERTAINTY_SEED,
+        "cap": entry["cap"],
+        "freq": RESAMPLE_FREQ,
+        # The table and the model differ slightly, so their runs are kept apart
+        "source": "surrogate" if table is not None and table.covers(future) else "model",
+    }
+    forecast_history = get_forecast_history()
+    forecast = forecast_history.find(horizon=len(future), **run)
+    if forecast is None:
+        forecast = model.make_predictions(
+            models,
+            future,
+            uncertainty_samples=samples,
+            seed=UNCERTAINTY_SEED,
+            surrogate=table,
+            design=get_registry().design(entry["crop"], entry["site"]),
+        )
+        forecast_history.record(forecast, hole=future["hole"].iloc[0], **run)
+    return forecast
+
+
 def select_image_path(periods):
     """Select the appropriate image based on the predicted leaf count."""
     if periods <= 10:
@@ -210,7 +345,8 @@ def select_image_path(periods):
         return "https://github.com/Vinzzztty/Forecasting-Hidroponik/blob/V2/assets/high_leaf.png?raw=true"
 
 
-def display_summary(df, df_prophet, forecast, periods):
+@st.experimental_fragment
+def display_summary(df, df_prophet, forecast, periods, entry):
     """Display summary of the forecasting results."""
     st.markdown(f"#### 📝 Kesimpulan")
     conclusion = cek_optimization.summarize_forecast(df, forecast, periods)
@@ -225,8 +361,13 @@ def display_summary(df, df_prophet, forecast, periods):
     st.plotly_chart(fig)
 
     st.markdown("##### 🔍 Kesimpulan Masing Masing Variabel")
+    # Observed regressors carry the '_x' suffix the conditions use; named
+    # explicitly, since forecasts reused from the history have no component
+    # columns for the merge to collide with
+    observed = df_prophet.rename(columns={name: f"{name}_x" for name in model.REGRESSORS})
     suggestions = cek_optimization.check_optimization(
-        pd.merge(df_prophet, forecast, on="ds")
+        pd.merge(observed, forecast, on="ds"),
+        {f"{name}_x": bounds for name, bounds in entry["optimal_conditions"].items()},
     )
 
     if suggestions:
@@ -261,79 +402,292 @@ def display_summary(df, df_prophet, forecast, periods):
         )
 
 
+@st.experimental_fragment
+def simulate_scenarios(df_prophet, periods, models, entry):
+    """Sweep two environmental regressors and show the forecast as a heatmap."""
+    st.markdown("#### 🧪 Simulasi Skenario Lingkungan")
+    features = [feature for feature in model.REGRESSORS if feature != "hole"]
+
+    col1, col2 = st.columns(2)
+    ranges = {}
+    for col, label, default in [(col1, "Fitur X", "EC"), (col2, "Fitur Y", "pH")]:
+        with col:
+            feature = st.selectbox(
+                f"Pilih {label}",
+                features,
+                index=features.index(default),
+                key=f"scenario_{label}",
+            )
+            lower, upper = entry["optimal_conditions"][feature]
+            ranges[feature] = st.slider(
+                f"Rentang {feature}",
+                min_value=float(lower) * 0.5,
+                max_value=float(upper) * 1.5,
+                value=(float(lower), float(upper)),
+                key=f"scenario_range_{label}",
+            )
+
+    if len(ranges) < 2:
+        st.write("🔍 Pilih dua fitur yang berbeda untuk disimulasikan.")
+        return
+
+    steps = st.slider("Jumlah titik per fitur", min_value=5, max_value=50, value=20)
+    day = st.slider("Hari ke-", min_value=1, max_value=periods, value=periods)
+
+    grid = scenario.build_scenario_grid(
+        {feature: np.linspace(low, high, steps) for feature, (low, high) in ranges.items()}
+    )
+    result, _ = disk_cache.remember(
+        (
+            "scenarios",
+            session.content_hash(df_prophet, grid),
+            get_registry().version(entry["crop"], entry["site"]),
+            entry["cap"],
+            periods,
+            # Tables and the model differ slightly; a new table must not
+            # serve results of the old one, or of no table at all
+            surrogate_key(entry),
+        ),
+        lambda: scenario.forecast_scenarios(
+            models,
+            df_prophet,
+            periods,
+            grid,
+            cap=entry["cap"],
+            surrogate=get_surrogate(entry["crop"], entry["site"]),
+            design=get_registry().design(entry["crop"], entry["site"]),
+        ),
+    )
+
+    feature_x, feature_y = ranges
+    fig = visualization.plot_scenario_heatmap(grid, result, feature_x, feature_y, day)
+    st.plotly_chart(fig)
+
+
+@st.experimental_fragment
+def recommend_setpoints(df_prophet, periods, models, entry):
+    """Recommend regressor setpoints within the optimal ranges that maximise the forecast."""
+    st.markdown("#### 🎛️ Rekomendasi Setpoint Lingkungan")
+    day = st.slider(
+        "Target hari ke-",
+        min_value=1,
+        max_value=periods,
+        value=periods,
+        key="setpoint_day",
+    )
+
+    if st.button("Cari Setpoint Optimal"):
+        with st.spinner("⏳ Mencari setpoint terbaik..."):
+            result = disk_cache.remember(
+                (
+                    "setpoints",
+                    session.content_hash(df_prophet),
+                    get_registry().version(entry["crop"], entry["site"]),
+                    entry["cap"],
+                    session.content_hash(entry["optimal_conditions"]),
+                    day,
+                    surrogate_key(entry),
+                ),
+                lambda: optimizer.optimize_setpoints(
+                    models,
+                    df_prophet,
+                    day,
+                    bounds=optimizer.optimal_bounds(entry),
+                    cap=entry["cap"],
+                    surrogate=get_surrogate(entry["crop"], entry["site"]),
+                    design=get_registry().design(entry["crop"], entry["site"]),
+                ),
+            )
+
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Setpoint": result["setpoints"],
+                    "Nilai Terakhir": df_prophet[list(result["setpoints"])].iloc[-1],
+                }
+            )
+        )
+        st.info(
+            f"🌱 Dengan setpoint ini, jumlah daun pada hari ke-{day} diprediksi mencapai "
+            f"**{result['forecast']:.2f}** daun ({result['gain']:+.2f} dibandingkan kondisi terakhir, "
+            f"{result['evaluations']} evaluasi)."
+        )
+
+
+@st.experimental_fragment
+def explore_features(df, sensor_index):
+    """Let the user visualize single features and compare two of them."""
+    # The anomaly flag of the "Tandai saja" screening is not a sensor reading
+    features = [feature for feature in df.columns[1:] if feature != "anomaly"]
+
+    # The indexed frame already numbers its days, so the charts neither
+    # recompute nor add them
+    st.markdown("### 🔎 Detail Variabel")
+    selected_feature = st.selectbox("🎯 Pilih fitur untuk divisualisasikan:", features)
+    visualization.visualize_feature(sensor_index.frame, selected_feature)
+
+    st.markdown("#### 🆚 Visualisasi Perbandingan Fitur")
+    feature_a = st.selectbox("Pilih Fitur A", features)
+    feature_b = st.selectbox("Pilih Fitur B", features[1:])
+    if feature_a and feature_b:
+        visualization.visualize_comparison(
+            sensor_index.chronological(), feature_a, feature_b
+        )
+
+
+@st.cache_resource
+def get_quality_model():
+    """Load the growth pattern model once per process, training it once per cache volume."""
+    if os.path.exists(model.QUALITY_DATA_PATH):
+        data_version = store.file_digest(model.QUALITY_DATA_PATH)
+    else:
+        data_version = model.QUALITY_DATA_URL
+    return disk_cache.get_disk_cache().get_or_compute(
+        session.content_hash("quality_model", data_version), model.quality_model
+    )
+
+
+@st.experimental_fragment
+def predict_growth_pattern():
+    """Predict the growth pattern from sensor values entered by the user."""
+    st.markdown(f"#### Pola Pertumbuhan Tanaman Selada")
+
+    # Display loading spinner while the model is being loaded
+    with st.spinner("Loading model..."):
+        model_quality, accuracy = get_quality_model()
+
+    st.write("Enter the values for prediction")
+    # Create two columns for inputs
+    col5, col6 = st.columns(2)
+
+    with col5:
+        temperature_2 = st.number_input(
+            "Temperature", format="%.2f", value=25.9, step=0.01
+        )
+        humidity_2 = st.number_input("Humidity", value=84, step=1)
+        light_2 = st.number_input("Light", value=10870, step=1)
+
+    with col6:
+        pH_2 = st.number_input("pH", format="%.2f", value=6.6, step=0.01)
+        EC_2 = st.number_input("EC", value=983, step=1)
+        TDS_2 = st.number_input("TDS", value=493, step=1)
+        WaterTemp_2 = st.number_input(
+            "Water Temperature", format="%.2f", value=26.3, step=0.01
+        )
+
+    # Create input data for prediction
+    input_data = {
+        "temperature": temperature_2,
+        "humidity": humidity_2,
+        "light": light_2,
+        "pH": pH_2,
+        "EC": EC_2,
+        "TDS": TDS_2,
+        "WaterTemp": WaterTemp_2,
+    }
+
+    # Make prediction
+    if st.button("Predict"):
+        prediction_result = model.predict_pattern(model_quality, input_data)
+        st.write(f"Predicted Quality: {prediction_result}")
+
+
+@st.experimental_fragment
+def display_history(entry, df, df_prophet):
+    """Compare the latest forecasts stored for this data, crop and greenhouse."""
+    with st.expander("📜 Riwayat Prediksi"):
+        since = pd.Timestamp.now() - pd.Timedelta(days=HISTORY_DAYS)
+        # The hole the forecasts were recorded with, see predict_or_reuse
+        hole = model.create_future_dataframe(df_prophet, periods=1)["hole"].iloc[0]
+        drift = get_forecast_history().drift(
+            entry["crop"],
+            entry["site"],
+            hole=hole,
+            since=since,
+            input_hash=session.content_hash(df),
+        )
+        latest_runs = drift["run_id"].drop_duplicates().nlargest(HISTORY_RUNS)
+        drift = drift[drift["run_id"].isin(latest_runs)]
+        if len(latest_runs) < 2:
+            st.write("Belum ada prediksi sebelumnya untuk dibandingkan.")
+            return
+
+        st.write(
+            f"Prediksi jumlah daun dari {len(latest_runs)} run terakhir "
+            f"({HISTORY_DAYS} hari terakhir)."
+        )
+        # Keyed by run id, runs created in the same second stay apart
+        st.line_chart(drift.pivot_table(index="ds", columns="run_id", values="yhat"))
+        # Largest change of any day against the first run that predicted it
+        runs = drift.groupby("run_id").agg(
+            waktu=("created_at", "first"),
+            model=("model_version", "first"),
+            sumber=("source", "first"),
+            hari=("ds", "count"),
+            perubahan_maks=("drift", lambda change: change.abs().max()),
+        )
+        st.dataframe(runs.sort_index(ascending=False))
+
+
+def render_memory_usage():
+    """Show how much memory this session holds in the sidebar."""
+    stats = session.session_stats()
+    figures = figure_cache.get_figure_cache().stats()
+    disk = disk_cache.get_disk_cache()
+    with st.sidebar:
+        st.caption(
+            f"💾 Memori sesi: {stats.get('session_bytes', 0) / session.MB:.1f} MB "
+            f"· total server: {stats['total_bytes'] / session.MB:.1f} MB "
+            f"({stats['sessions']} sesi) "
+            f"· cache grafik: {figures['total_bytes'] / session.MB:.1f} MB "
+            f"({figures['figures']} grafik) "
+            f"· cache disk: {disk.hits} hit / {disk.misses} miss"
+            + sensor_store_caption()
+        )
+
+
+def sensor_store_caption():
+    """Size of the mapped sensor store, if the example data comes from it."""
+    sensor_store = get_sensor_store()
+    if sensor_store is None:
+        return ""
+    usage = sensor_store.memory_usage()
+    return (
+        f" · data sensor bersama: {usage['total'] / session.MB:.1f} MB "
+        f"(float64: {usage['float64_equivalent'] / session.MB:.1f} MB)"
+    )
+
+
 def main():
     set_page_config()
     inject_custom_css()
     render_sidebar()
+    models, entry = select_model()
 
     st.title("Welcome to Forecasting Page")
     option = st.radio(
         "Pilih metode input data:", ("Unggah file CSV", "Gunakan contoh file CSV")
     )
-    df = handle_file_upload(option)
+    df, validated = handle_file_upload(option)
 
     if df is not None:
-        df = preprocess_data(df)
+        if not validated:
+            df = preprocess_data(df)
         if df is not None:
+            df = screen_sensor_data(df)
             st.markdown("### 📊 Data tanaman yang di Upload")
             st.dataframe(df)
-            df_prophet, forecast = forecast_growth(df)
-            display_summary(df, df_prophet, forecast, periods=MAX_DAY)
+            sensor_index = index_sensor_data(df)
+            df_prophet, forecast = forecast_growth(df, sensor_index, models, entry)
+            display_summary(df, df_prophet, forecast, MAX_DAY, entry)
+            simulate_scenarios(df_prophet, len(forecast), models, entry)
+            recommend_setpoints(df_prophet, len(forecast), models, entry)
+            display_history(entry, df, df_prophet)
 
-            st.markdown("### 🔎 Detail Variabel")
-            selected_feature = st.selectbox(
-                "🎯 Pilih fitur untuk divisualisasikan:", df.columns[1:]
-            )
-            visualization.visualize_feature(df, selected_feature)
-
-            st.markdown("#### 🆚 Visualisasi Perbandingan Fitur")
-            feature_a = st.selectbox("Pilih Fitur A", df.columns[1:])
-            feature_b = st.selectbox("Pilih Fitur B", df.columns[2:])
-            if feature_a and feature_b:
-                visualization.visualize_comparison(df, feature_a, feature_b)
-
-            # Add Quality Prediction Section
-            st.markdown(f"#### Pola Pertumbuhan Tanaman Selada")
-
-            # Display loading spinner while the model is being loaded
-            with st.spinner("Loading model..."):
-                # Load Model Pola Pertumbuhan Tanaman Selada
-                model_quality, accuracy = model.quality_model()
-
-            st.write("Enter the values for prediction")
-            # Create two columns for inputs
-            col5, col6 = st.columns(2)
-
-            with col5:
-                temperature_2 = st.number_input(
-                    "Temperature", format="%.2f", value=25.9, step=0.01
-                )
-                humidity_2 = st.number_input("Humidity", value=84, step=1)
-                light_2 = st.number_input("Light", value=10870, step=1)
-
-            with col6:
-                pH_2 = st.number_input("pH", format="%.2f", value=6.6, step=0.01)
-                EC_2 = st.number_input("EC", value=983, step=1)
-                TDS_2 = st.number_input("TDS", value=493, step=1)
-                WaterTemp_2 = st.number_input(
-                    "Water Temperature", format="%.2f", value=26.3, step=0.01
-                )
-
-            # Create input data for prediction
-            input_data = {
-                "temperature": temperature_2,
-                "humidity": humidity_2,
-                "light": light_2,
-                "pH": pH_2,
-                "EC": EC_2,
-                "TDS": TDS_2,
-                "WaterTemp": WaterTemp_2,
-            }
-
-            # Make prediction
-            if st.button("Predict"):
-                prediction_result = model.predict_pattern(model_quality, input_data)
-                st.write(f"Predicted Quality: {prediction_result}")
+            explore_features(df, sensor_index)
+            predict_growth_pattern()
+
+            render_memory_usage()
         else:
             st.write("Silakan unggah file CSV terlebih dahulu.")
 
@@ -0,0 +1,124 @@
+import streamlit as st
+from utils import visualization, streaming
+
+# GLOBAL VARIABLE
+FORECAST_DAYS = 10
+BUFFER_SIZE = 2000
+REFORECAST_EVERY = 50
+REFORECAST_INTERVAL = 60
+REFRESH_SECONDS = 5
+
+
+def set_page_config():
+    """Set the initial page configuration."""
+    st.set_page_config(
+        page_icon="https://github.com/Vinzzztty/Forecasting-Hidroponik/blob/V2/assets/logo_hijau.png?raw=true",
+        page_title="Hydrosim - Live Monitoring",
+        layout="wide",
+        initial_sidebar_state="expanded",
+    )
+
+
+def inject_custom_css():
+    """Inject custom CSS for styling."""
+    st.markdown(
+        """
+        <style>
+        /* Change the background color of the sidebar */
+        [data-testid="stSidebar"] {
+            background-color: #ffffff;
+        }
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
+
+
+def render_sidebar():
+    """Render the sidebar with navigation."""
+    with st.sidebar:
+        st.markdown(
+            "![Logo](https://github.com/Vinzzztty/Forecasting-Hidroponik/blob/V2/assets/new_hijau.png?raw=true)"
+        )
+
+
+@st.cache_resource
+def start_stream(port):
+    """Start the ingestion endpoint once per host, or read the one already running.
+
+    Only one process can bind the port; every other server process, or all
+    of them when ``python -m utils.streaming serve`` runs, reads that
+    endpoint's buffer and forecast over HTTP.
+    """
+    client = streaming.StreamClient(f"http://127.0.0.1:{port}")
+    try:
+        client.status()
+        return client
+    except OSError:
+        pass
+
+    stream = streaming.stream_from_registry(
+        FORECAST_DAYS,
+        capacity=BUFFER_SIZE,
+        reforecast_every=REFORECAST_EVERY,
+        interval=REFORECAST_INTERVAL,
+    )
+    try:
+        streaming.serve(stream, port=port, background=True)
+    except OSError:
+        # Another process bound the port since the check above
+        return client
+    return stream
+
+
+@st.experimental_fragment(run_every=REFRESH_SECONDS)
+def live_view(stream):
+    """Redraw the buffered readings and the latest forecast."""
+    try:
+        status, df, forecast = stream.status(), stream.frame(), stream.forecast
+    except OSError as e:
+        # Only a StreamClient reads over the network
+        st.error(f"⚠️ Endpoint data sensor tidak dapat dihubungi: {e}")
+        return
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Data diterima", status["received"])
+    col2.metric("Jumlah lubang", len(status["holes"]))
+    col3.metric("Forecast terakhir", status["forecast_at"] or "-")
+
+    if status["error"]:
+        st.error(f"⚠️ Forecast gagal: {status['error']}")
+
+    if df is None:
+        st.info("⏳ Menunggu data sensor...")
+        return
+
+    if forecast is not None:
+        st.markdown(f"### 📈 Forecasting {FORECAST_DAYS} Hari Ke Depan")
+        fig = visualization.plot_forecast(forecast, FORECAST_DAYS)
+        st.plotly_chart(fig)
+
+    selected_feature = st.selectbox(
+        "🎯 Pilih fitur untuk divisualisasikan:", streaming.SENSOR_COLUMNS
+    )
+    visualization.visualize_feature(df, selected_feature)
+
+
+def main():
+    set_page_config()
+    inject_custom_css()
+    render_sidebar()
+
+    st.title("Live Monitoring Sensor")
+    stream = start_stream(streaming.DEFAULT_PORT)
+    st.markdown(
+        f"Kirim data sensor (kolom sama dengan file CSV) ke "
+        f"`POST http://127.0.0.1:{streaming.DEFAULT_PORT}/readings`. "
+        f"Untuk uji coba jalankan `python -m utils.streaming replay`. "
+        f"Jika aplikasi berjalan dengan beberapa proses, jalankan endpoint ini "
+        f"terpisah dengan `python -m utils.streaming serve`."
+    )
+    live_view(stream)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from utils.api import (
+    MicroBatcher,
+    _make_handler,
+    _Server,
+    validate_forecast_request,
+    validate_pattern_request,
+)
+from utils.model import REGRESSORS
+from utils.registry import ModelRegistry
+
+
+@pytest.fixture
+def models_registry():
+    # Validation only reads the entries; no model is loaded
+    return ModelRegistry(
+        [{"crop": "Selada", "site": "default", "path": "unused", "cap": 18}]
+    )
+
+
+def forecast_body(**changes):
+    body = {
+        "start": "2024-06-01",
+        "periods": 10,
+        "regressors": {name: 1.0 for name in REGRESSORS},
+    }
+    body.update(changes)
+    return body
+
+
+def test_valid_forecast_request_is_normalized(models_registry):
+    body = forecast_body(periods="5", regressors={name: "2" for name in REGRESSORS})
+    item = validate_forecast_request(body, models_registry)
+    assert (item["crop"], item["site"]) == ("Selada", "default")
+    assert item["periods"] == 5
+    assert item["start"] == "2024-06-01 00:00:00"
+    assert item["regressors"] == {name: 2.0 for name in REGRESSORS}
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        ([1, 2], "JSON object"),
+        ({"periods": 10, "regressors": {}}, "Missing fields"),
+        (forecast_body(crop="Kangkung"), "Kangkung"),
+        (forecast_body(regressors=[1.0] * len(REGRESSORS)), "must be an object"),
+        (forecast_body(regressors={"hole": 1.0}), "Missing regressors"),
+        (
+            forecast_body(regressors={**dict.fromkeys(REGRESSORS, 1.0), "pH": "asam"}),
+            "must be a number",
+        ),
+        (
+            forecast_body(regressors={**dict.fromkeys(REGRESSORS, 1.0), "EC": "nan"}),
+            "must be finite",
+        ),
+        (forecast_body(start="besok"), None),
+        (forecast_body(start=None), "must be a date"),
+        (forecast_body(periods=0), "between 1 and 365"),
+        (forecast_body(periods=366), "between 1 and 365"),
+    ],
+)
+def test_invalid_forecast_request(models_registry, body, message):
+    with pytest.raises(ValueError) as error:
+        validate_forecast_request(body, models_registry)
+    if message is not None:
+        assert message in str(error.value)
+
+
+def test_pattern_request_needs_every_feature():
+    assert validate_pattern_request({"a": "1", "b": 2}, ["a", "b"]) == {"a": 1.0, "b": 2.0}
+    with pytest.raises(ValueError, match="Missing features"):
+        validate_pattern_request({"a": 1}, ["a", "b"])
+    with pytest.raises(ValueError, match="JSON object"):
+        validate_pattern_request("a=1", ["a"])
+
+
+@pytest.fixture
+def api_url(models_registry):
+    batchers = {
+        "forecast": MicroBatcher(lambda items: [{"ok": True} for _ in items]),
+        "pattern": MicroBatcher(lambda items: [{"pattern": 1} for _ in items]),
+    }
+    server = _Server(("127.0.0.1", 0), _make_handler(batchers, models_registry, ["a"]))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, data):
+    request = urllib.request.Request(url, data=data, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+@pytest.mark.parametrize(
+    "path, data",
+    [
+        ("/forecast", b"{not json"),
+        ("/forecast", b"[]"),
+        ("/forecast", json.dumps(forecast_body(periods=0)).encode()),
+        ("/pattern", b"{}"),
+    ],
+)
+def test_invalid_requests_get_400(api_url, path, data):
+    status, payload = post(api_url + path, data)
+    assert status == 400
+    assert payload["error"]
+
+
+def test_valid_request_and_unknown_path(api_url):
+    assert post(api_url + "/forecast", json.dumps(forecast_body()).encode()) == (
+        200,
+        {"ok": True},
+    )
+    assert post(api_url + "/predict", b"{}")[0] == 404
+
+
+def submit_together(batcher, items):
+    results = [None] * len(items)
+    barrier = threading.Barrier(len(items))
+
+    def submit(i):
+        barrier.wait()
+        try:
+            results[i] = batcher.submit(items[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(items))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_concurrent_requests_share_one_batch():
+    batches = []
+
+    def handler(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    # A wait far above the thread start-up time, so every request makes it
+    batcher = MicroBatcher(handler, max_batch_size=32, max_wait=1.0)
+    assert submit_together(batcher, list(range(8))) == [i * 2 for i in range(8)]
+    assert len(batches) == 1
+    assert sorted(batches[0]) == list(range(8))
+    assert batcher.metrics()["mean_batch_size"] == 8
+
+
+def test_full_batch_is_dispatched_without_waiting():
+    batches = []
+
+    def handler(items):
+        batches.append(len(items))
+        return items
+
+    batcher = MicroBatcher(handler, max_batch_size=4, max_wait=30)
+    start = time.perf_counter()
+    assert submit_together(batcher, list(range(8))) == list(range(8))
+    assert time.perf_counter() - start < 10
+    assert batches == [4, 4]
+
+
+def test_errors_fail_only_their_requests():
+    def handler(items):
+        return [ValueError(item) if item < 0 else item for item in items]
+
+    batcher = MicroBatcher(handler, max_wait=0.5)
+    results = submit_together(batcher, [1, -1, 2])
+    assert results[0] == 1 and results[2] == 2
+    assert isinstance(results[1], ValueError)
+
+    def broken(items):
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(broken, max_wait=0.5)
+    results = submit_together(batcher, [1, 2])
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from utils.disk_cache import DiskCache
+from utils.session import content_hash
+
+KEYS = [content_hash("key", i) for i in range(40)]
+
+
+def value_of(key):
+    # Large enough that a few dozen values overflow the cache below
+    return {"key": key, "payload": key * 50}
+
+
+def cached_bytes(directory):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(directory)
+        for name in names
+        if name.endswith(".pkl")
+    )
+
+
+def hammer(directory, max_bytes, seed, rounds, errors):
+    cache = DiskCache(directory, max_bytes)
+    for i in range(rounds):
+        key = KEYS[(seed * 7 + i) % len(KEYS)]
+        try:
+            if i % 3 == 0:
+                cache.put(key, value_of(key))
+            elif i % 3 == 1:
+                value = cache.get(key)
+                # Missing is fine, a torn or foreign value is not
+                assert value is None or value == value_of(key)
+            else:
+                cache.evict()
+        except Exception as e:
+            errors.append(repr(e))
+
+
+def test_put_get_evict_race_between_threads(tmp_path):
+    max_bytes = 20_000
+    errors = []
+    threads = [
+        threading.Thread(target=hammer, args=(tmp_path, max_bytes, seed, 300, errors))
+        for seed in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    DiskCache(tmp_path, max_bytes).evict()
+    assert cached_bytes(tmp_path) <= max_bytes
+    assert not [
+        name for _, _, names in os.walk(tmp_path) for name in names if name.endswith(".tmp")
+    ]
+
+
+def hammer_process(directory, max_bytes, seed):
+    errors = []
+    hammer(directory, max_bytes, seed, 200, errors)
+    return errors
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork"
+)
+def test_put_get_evict_race_between_processes(tmp_path):
+    max_bytes = 20_000
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        results = pool.starmap(
+            hammer_process, [(str(tmp_path), max_bytes, seed) for seed in range(4)]
+        )
+
+    assert [error for errors in results for error in errors] == []
+    DiskCache(tmp_path, max_bytes).evict()
+    assert cached_bytes(tmp_path) <= max_bytes
+
+
+def test_concurrent_misses_compute_once(tmp_path):
+    cache = DiskCache(tmp_path)
+    calls = []
+    barrier = threading.Barrier(8)
+    results = []
+
+    def compute():
+        calls.append(1)
+        return value_of(KEYS[0])
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get_or_compute(KEYS[0], compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [value_of(KEYS[0])] * 8
+
+
+def test_eviction_keeps_recently_read_entries(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=10**9)
+    for key in KEYS[:10]:
+        cache.put(key, value_of(key))
+    # The first two are the oldest writes, but read last
+    for i, key in enumerate(KEYS[:10]):
+        os.utime(cache._path(key), (0, 0) if i < 2 else (1000, 1000))
+    for key in KEYS[:2]:
+        cache.get(key)
+
+    cache.max_bytes = cached_bytes(tmp_path) // 2
+    cache.evict()
+    assert cache.get(KEYS[0]) == value_of(KEYS[0])
+    assert cache.get(KEYS[1]) == value_of(KEYS[1])
+    assert cached_bytes(tmp_path) <= cache.max_bytes
+
+
+def test_entry_removed_after_load_is_still_a_hit(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path)
+    cache.put(KEYS[0], value_of(KEYS[0]))
+
+    def removed(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", removed)
+    assert cache.get(KEYS[0]) == value_of(KEYS[0])
+    assert cache.hits == 1
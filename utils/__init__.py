@@ -1,17 +1,62 @@
-from .model import (
-    load_model,
-    prepare_data,
-    create_future_dataframe,
-    make_predictions,
-    quality_model,
-    predict_pattern,
-)
-from .visualization import (
-    plot_forecast,
-    plot_growth_bar,
-    calculate_growth_percentage,
-    visualize_feature,
-    visaulize_all_features,
-    visualize_comparison,
-)
-from .cek_optimization import check_optimization, summarize_forecast
+import importlib
+
+# Public names and the submodule defining them. They are imported on first
+# access, so `python -m utils.<cli>` does not import its own module twice
+# and the pages only pay for the modules they use.
+_EXPORTS = {
+    "model": [
+        "load_model",
+        "prepare_data",
+        "resample_data",
+        "create_future_dataframe",
+        "make_predictions",
+        "quality_model",
+        "predict_pattern",
+    ],
+    "visualization": [
+        "plot_forecast",
+        "plot_growth_bar",
+        "calculate_growth_percentage",
+        "visualize_feature",
+        "visaulize_all_features",
+        "visualize_comparison",
+        "plot_scenario_heatmap",
+    ],
+    "cek_optimization": ["check_optimization", "summarize_forecast"],
+    "evaluation": ["run_backtest"],
+    "metrics": ["load_metrics"],
+    "scenario": ["build_scenario_grid", "forecast_scenarios"],
+    "optimizer": ["optimize_setpoints"],
+    "streaming": ["SensorStream", "serve", "replay"],
+    "store": ["SensorStore"],
+    "session": ["SessionMemoryManager", "remember"],
+    "api": ["MicroBatcher"],
+    "registry": ["ModelRegistry"],
+    "bundle": ["save_bundle", "load_bundle"],
+    "figure_cache": ["FigureCache", "cached_figure"],
+    "anomaly": ["screen_anomalies"],
+    "uncertainty": ["predict_with_intervals"],
+    "validation": ["read_upload", "validate_frame"],
+    "training": ["train_models"],
+    "loadtest": ["run_load_test"],
+    "index": ["SensorIndex"],
+    "history": ["ForecastHistory"],
+    "disk_cache": ["DiskCache"],
+    "surrogate": ["ForecastSurrogate"],
+    "design": ["DesignCache"],
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_MODULES[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+# Sensor columns screened for glitches; 'hole' and the target are left alone
+SCREENED_FEATURES = [
+    "temperature",
+    "humidity",
+    "light",
+    "pH",
+    "EC",
+    "TDS",
+    "WaterTemp",
+]
+
+# Readings outside these ranges cannot be physical
+SENSOR_LIMITS = {
+    "temperature": (0, 60),
+    "humidity": (0, 100),
+    "light": (0, 200000),
+    "pH": (0, 14),
+    "EC": (0, 10000),
+    "TDS": (0, 10000),
+    "WaterTemp": (0, 60),
+}
+
+ACTIONS = ("flag", "clip", "drop")
+
+# Scales a MAD to a standard deviation for normally distributed readings
+MAD_TO_STD = 1.4826
+
+
+def robust_zscores(df, features=None, window=31, min_scale=0.02):
+    """Robust z-score of every reading against its hole's centred rolling median and MAD.
+
+    ``window`` counts readings of the same hole (31 is about three days of
+    logging). ``min_scale`` floors the MAD at that fraction of the rolling
+    median, so spikes in otherwise constant stretches still stand out.
+    Returns the z-scores plus the rolling median and scale used for clipping.
+    """
+    features = features or SCREENED_FEATURES
+    # Rolling windows need each hole's readings in time order
+    order = np.lexsort((df["datetime"].to_numpy(), df["hole"].to_numpy()))
+    values = df[features].iloc[order].reset_index(drop=True)
+    holes = df["hole"].to_numpy()[order]
+
+    def rolling_median(frame):
+        return (
+            frame.groupby(holes, sort=False)
+            .rolling(window, center=True, min_periods=1)
+            .median()
+            .reset_index(level=0, drop=True)
+            .sort_index()
+        )
+
+    median = rolling_median(values)
+    deviation = (values - median).abs()
+    scale = rolling_median(deviation) * MAD_TO_STD
+    scale = np.maximum(scale, median.abs() * min_scale).replace(0, np.nan)
+    zscores = (deviation / scale).fillna(0)
+
+    # Back to the caller's row order, positionally so duplicate labels are fine
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+
+    def restore(frame):
+        return pd.DataFrame(frame.to_numpy()[inverse], index=df.index, columns=features)
+
+    return restore(zscores), restore(median), restore(scale)
+
+
+def screen_anomalies(df, action="clip", features=None, window=31, threshold=3.5):
+    """Flag, clip or drop sensor glitches before the data reaches the forecaster.
+
+    A reading is anomalous when its robust z-score exceeds ``threshold`` or it
+    is outside ``SENSOR_LIMITS``. ``flag`` adds a boolean ``anomaly`` column,
+    ``clip`` pulls anomalous readings back to the edge of the accepted band and
+    ``drop`` removes rows with any anomalous reading; clipped features come
+    back as floats. Returns the screened frame and a report with counts per
+    feature.
+    """
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action {action!r}, expected one of {ACTIONS}")
+    features = [col for col in (features or SCREENED_FEATURES) if col in df.columns]
+
+    zscores, median, scale = robust_zscores(df, features, window)
+    lower = pd.DataFrame({col: SENSOR_LIMITS[col][0] for col in features}, index=df.index)
+    upper = pd.DataFrame({col: SENSOR_LIMITS[col][1] for col in features}, index=df.index)
+    out_of_range = (df[features] < lower) | (df[features] > upper)
+    anomalous = (zscores > threshold) | out_of_range
+
+    report = {
+        "action": action,
+        "rows": len(df),
+        "anomalous_rows": int(anomalous.any(axis=1).sum()),
+        "per_feature": anomalous.sum().astype(int).to_dict(),
+    }
+
+    if action == "flag":
+        df = df.assign(anomaly=anomalous.any(axis=1))
+    elif action == "clip":
+        band = scale.fillna(0) * threshold
+        clipped = df[features].clip(
+            np.maximum(median - band, lower), np.minimum(median + band, upper)
+        )
+        df = df.copy()
+        # Float columns, so integer readings are not truncated to the band edge
+        df[features] = df[features].astype(float).where(~anomalous, clipped)
+    else:
+        df = df[~anomalous.any(axis=1)]
+
+    return df, report
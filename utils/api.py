@@ -0,0 +1,317 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from .model import REGRESSORS, PATTERN_MAPPING, quality_model
+from .registry import ModelRegistry
+from .scenario import scenario_basis, apply_scenarios
+from .surrogate import load_surrogate
+
+DEFAULT_PORT = 8000
+
+
+class MicroBatcher:
+    """Coalesce concurrent requests into one call of ``handler(items) -> results``.
+
+    A batch is dispatched when it reaches ``max_batch_size`` items or
+    ``max_wait`` seconds after its first item arrived, whichever comes first.
+    A handler can fail single items by returning an exception in their place.
+    """
+
+    def __init__(self, handler, max_batch_size=32, max_wait=0.01):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+
+        self.started = time.monotonic()
+        self.requests = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=10000)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def submit(self, item):
+        """Queue ``item`` and block until its batch has been processed."""
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future.result()
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.handler(items)
+                for (_, future, _), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+
+            now = time.perf_counter()
+            with self._lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self.latencies.extend(now - submitted for _, _, submitted in batch)
+
+    def metrics(self):
+        with self._lock:
+            latencies = np.array(self.latencies) * 1000
+            elapsed = time.monotonic() - self.started
+            metrics = {
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_size": self.requests / self.batches if self.batches else 0,
+                "throughput_rps": self.requests / elapsed if elapsed else 0,
+            }
+        if len(latencies):
+            for q in (50, 95, 99):
+                metrics[f"latency_p{q}_ms"] = float(np.percentile(latencies, q))
+        return metrics
+
+
+def make_forecast_handler(models_registry, surrogates=None):
+    surrogates = surrogates or {}
+
+    def handler(items):
+        # One base forecast per (crop, site, start, periods); all requests
+        # sharing it are served by a single vectorised regressor shift
+        results = [None] * len(items)
+        groups = {}
+        for i, item in enumerate(items):
+            key = (item["crop"], item["site"], item["start"], int(item["periods"]))
+            groups.setdefault(key, []).append(i)
+
+        for (crop, site, start, periods), indices in groups.items():
+            # One row per request, so a bad request fails alone
+            rows = []
+            for i in indices:
+                try:
+                    rows.append(
+                        [float(items[i]["regressors"][name]) for name in REGRESSORS]
+                    )
+                except (KeyError, TypeError, ValueError) as e:
+                    results[i] = ValueError(f"Invalid regressors: {e}")
+            indices = [i for i in indices if results[i] is None]
+            if not indices:
+                continue
+
+            try:
+                model = models_registry.get(crop, site)
+                cap = models_registry.entry(crop, site)["cap"]
+                df_prophet = pd.DataFrame(
+                    {
+                        "ds": [pd.Timestamp(start)],
+                        **{name: [value] for name, value in zip(REGRESSORS, rows[0])},
+                    }
+                )
+                basis = scenario_basis(
+                    model,
+                    df_prophet,
+                    periods,
+                    REGRESSORS,
+                    cap,
+                    surrogates.get((crop, site)),
+                    models_registry.design(crop, site),
+                )
+                yhat = apply_scenarios(basis, np.array(rows))
+            except Exception as e:
+                for i in indices:
+                    results[i] = e
+                continue
+
+            ds = basis["ds"].dt.strftime("%Y-%m-%d %H:%M:%S").tolist()
+            for row, i in enumerate(indices):
+                results[i] = {"ds": ds, "yhat": yhat[row].astype(float).round(4).tolist()}
+        return results
+
+    return handler
+
+
+def make_pattern_handler(model):
+    def handler(items):
+        # All classifications of the batch in one predict call
+        predictions = model.predict(pd.DataFrame(items)[list(model.feature_names_in_)])
+        return [
+            {
+                "pattern": int(prediction),
+                "label": PATTERN_MAPPING.get(prediction, ("Unknown Pattern", None))[0],
+            }
+            for prediction in predictions
+        ]
+
+    return handler
+
+
+def require_object(body):
+    # Field access below assumes a JSON object
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    return body
+
+
+def validate_forecast_request(body, models_registry):
+    require_object(body)
+    missing = [key for key in ("start", "periods", "regressors") if key not in body]
+    if missing:
+        raise ValueError(f"Missing fields: {missing}")
+    # Without crop/site the first registered model is used
+    default_crop, default_site = models_registry.keys()[0]
+    body.setdefault("crop", default_crop)
+    body.setdefault("site", default_site)
+    try:
+        models_registry.entry(body["crop"], body["site"])
+    except KeyError as e:
+        raise ValueError(e.args[0])
+    if not isinstance(body["regressors"], dict):
+        raise ValueError("'regressors' must be an object")
+    missing = [name for name in REGRESSORS if name not in body["regressors"]]
+    if missing:
+        raise ValueError(f"Missing regressors: {missing}")
+    regressors = {}
+    for name in REGRESSORS:
+        try:
+            regressors[name] = float(body["regressors"][name])
+        except (TypeError, ValueError):
+            raise ValueError(f"Regressor {name!r} must be a number")
+        if not np.isfinite(regressors[name]):
+            raise ValueError(f"Regressor {name!r} must be finite")
+    body["regressors"] = regressors
+    start = pd.Timestamp(body["start"])
+    if pd.isna(start):
+        raise ValueError("'start' must be a date")
+    body["start"] = str(start)
+    body["periods"] = int(body["periods"])
+    if not 1 <= body["periods"] <= 365:
+        raise ValueError("'periods' must be between 1 and 365")
+    return body
+
+
+def validate_pattern_request(body, features):
+    require_object(body)
+    missing = [name for name in features if name not in body]
+    if missing:
+        raise ValueError(f"Missing features: {missing}")
+    return {name: float(body[name]) for name in features}
+
+
+class _Server(ThreadingHTTPServer):
+    # Controllers connect in bursts, the default backlog of 5 drops them
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def _make_handler(batchers, models_registry, features):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._reply(
+                    200, {name: batcher.metrics() for name, batcher in batchers.items()}
+                )
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path not in ("/forecast", "/pattern"):
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length))
+                if self.path == "/forecast":
+                    item = validate_forecast_request(body, models_registry)
+                else:
+                    item = validate_pattern_request(body, features)
+            except (ValueError, TypeError) as e:
+                self._reply(400, {"error": str(e)})
+                return
+
+            try:
+                result = batchers[self.path.strip("/")].submit(item)
+            except Exception as e:
+                self._reply(500, {"error": str(e)})
+                return
+            self._reply(200, result)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, max_batch_size=32, max_wait=0.01):
+    """Serve ``POST /forecast``, ``POST /pattern`` and ``GET /metrics``."""
+    models_registry = ModelRegistry.from_file()
+    pattern_model, _ = quality_model()
+    # Tables from `python -m utils.surrogate build`; models without one predict directly
+    surrogates = {
+        (crop, site): load_surrogate(
+            models_registry.get(crop, site),
+            models_registry.version(crop, site),
+            models_registry.entry(crop, site)["cap"],
+        )
+        for crop, site in models_registry.keys()
+    }
+
+    batchers = {
+        "forecast": MicroBatcher(
+            make_forecast_handler(models_registry, surrogates), max_batch_size, max_wait
+        ),
+        "pattern": MicroBatcher(
+            make_pattern_handler(pattern_model), max_batch_size, max_wait
+        ),
+    }
+    server = _Server(
+        (host, port),
+        _make_handler(batchers, models_registry, list(pattern_model.feature_names_in_)),
+    )
+    print(f"Serving on http://{host}:{port}")
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="HTTP prediction API with request micro-batching."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000)
+
+
+if __name__ == "__main__":
+    main()
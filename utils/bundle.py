@@ -0,0 +1,222 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from collections import OrderedDict
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+from prophet import serialize
+
+BUNDLE_FILE = "model.json"
+BUNDLE_VERSION = 1
+
+# Rows of the training history kept in the bundle: predict() needs at least two
+# to derive the step size of one-row futures, nothing else reads the history
+HISTORY_ROWS = 2
+
+# Fitted parameters that predict() recomputes instead of reading
+SKIPPED_PARAMS = ["trend"]
+
+
+def save_bundle(model, path, history_rows=HISTORY_ROWS):
+    """Write a fitted Prophet model as ``model.json`` plus one ``.npy`` per parameter.
+
+    Drops the Stan fit, the per-row ``trend`` parameter and all but the last
+    ``history_rows`` rows of the training history.
+    """
+    if model.history is None:
+        raise ValueError("Only fitted models can be exported")
+    os.makedirs(path, exist_ok=True)
+
+    model_dict = {
+        attribute: getattr(model, attribute) for attribute in serialize.SIMPLE_ATTRIBUTES
+    }
+    history = model.history.tail(history_rows)
+    series = {
+        "changepoints": model.changepoints,
+        "history_dates": model.history_dates[model.history_dates >= history["ds"].min()],
+        "train_holiday_names": model.train_holiday_names,
+    }
+    for attribute, value in series.items():
+        model_dict[attribute] = (
+            None if value is None else value.to_json(orient="split", date_format="iso")
+        )
+    frames = {
+        "holidays": model.holidays,
+        "history": history,
+        "train_component_cols": model.train_component_cols,
+    }
+    for attribute, value in frames.items():
+        model_dict[attribute] = (
+            None if value is None else value.to_json(orient="table", index=False)
+        )
+    model_dict["start"] = model.start.timestamp()
+    model_dict["t_scale"] = model.t_scale.total_seconds()
+    model_dict["changepoints_t"] = model.changepoints_t.tolist()
+    for attribute in serialize.ORDEREDDICT:
+        value = getattr(model, attribute)
+        model_dict[attribute] = [list(value), value]
+
+    params = [name for name in model.params if name not in SKIPPED_PARAMS]
+    for name in params:
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(model.params[name]))
+    model_dict["params"] = params
+    model_dict["bundle_version"] = BUNDLE_VERSION
+
+    with open(os.path.join(path, BUNDLE_FILE), "w") as f:
+        json.dump(model_dict, f)
+
+
+def load_bundle(path, mmap=True):
+    """Rebuild a Prophet model for prediction from a directory written by ``save_bundle``."""
+    with open(os.path.join(path, BUNDLE_FILE)) as f:
+        model_dict = json.load(f)
+    if model_dict.get("bundle_version") != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle version in {path}")
+
+    # Every attribute is restored below, skip __init__ and its Stan backend lookup
+    model = Prophet.__new__(Prophet)
+    for attribute in serialize.SIMPLE_ATTRIBUTES:
+        setattr(model, attribute, model_dict[attribute])
+
+    for attribute in serialize.PD_SERIES:
+        if model_dict[attribute] is None:
+            setattr(model, attribute, None)
+            continue
+        s = pd.read_json(StringIO(model_dict[attribute]), typ="series", orient="split")
+        if s.name == "ds":
+            s = pd.to_datetime(s).dt.tz_localize(None)
+        setattr(model, attribute, s)
+
+    for attribute in serialize.PD_DATAFRAME:
+        if model_dict[attribute] is None:
+            setattr(model, attribute, None)
+            continue
+        df = pd.read_json(
+            StringIO(model_dict[attribute]), typ="frame", orient="table", convert_dates=["ds"]
+        )
+        if attribute == "train_component_cols":
+            df.columns.name = "component"
+            df.index.name = "col"
+        setattr(model, attribute, df)
+
+    model.start = pd.Timestamp.utcfromtimestamp(model_dict["start"]).tz_localize(None)
+    model.t_scale = pd.Timedelta(seconds=model_dict["t_scale"])
+    model.changepoints_t = np.array(model_dict["changepoints_t"])
+    for attribute in serialize.ORDEREDDICT:
+        keys, values = model_dict[attribute]
+        setattr(model, attribute, OrderedDict((key, values[key]) for key in keys))
+
+    # Read-only memory maps: the pages are shared by every process using the bundle
+    mmap_mode = "r" if mmap else None
+    model.params = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in model_dict["params"]
+    }
+    model.fit_kwargs = {}
+    model.stan_backend = None
+    model.stan_fit = None
+    return model
+
+
+def is_bundle(path):
+    return os.path.isfile(os.path.join(path, BUNDLE_FILE))
+
+
+def bundle_size(path):
+    """Bytes on disk of a bundle directory or a single artifact file."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def bundle_version(path):
+    """Short content hash of a bundle directory or a single artifact file."""
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    else:
+        files = [path]
+    digest = hashlib.sha1()
+    for file in files:
+        digest.update(os.path.basename(file).encode())
+        with open(file, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+# Run in a fresh interpreter so import caches and earlier loads do not skew the numbers
+_BENCHMARK_SCRIPT = """
+import json, sys, time
+def rss():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+from utils.model import load_model
+before = rss()
+start = time.perf_counter()
+model = load_model(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({"load_s": elapsed, "rss_bytes": rss() - before}))
+"""
+
+
+def benchmark(paths, repeats=5):
+    """Median load time and resident memory growth per artifact, each load in its own process."""
+    rows = []
+    for path in paths:
+        runs = []
+        for _ in range(repeats):
+            output = subprocess.run(
+                [sys.executable, "-c", _BENCHMARK_SCRIPT, path],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        rows.append(
+            {
+                "artifact": path,
+                "size_kb": bundle_size(path) / 1024,
+                "load_ms": np.median([run["load_s"] for run in runs]) * 1000,
+                "rss_mb": np.median([run["rss_bytes"] for run in runs]) / 1024**2,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slim Prophet model bundles.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser(
+        "export", help="Convert a pickled Prophet model to a bundle directory."
+    )
+    export_parser.add_argument("--model", default="./model/prophet_model.pkl")
+    export_parser.add_argument("--output", default="./model/prophet_model")
+
+    benchmark_parser = subparsers.add_parser(
+        "benchmark", help="Compare load time and memory of model artifacts."
+    )
+    benchmark_parser.add_argument(
+        "paths", nargs="*", default=["./model/prophet_model.pkl", "./model/prophet_model"]
+    )
+    benchmark_parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        from .model import load_model
+
+        save_bundle(load_model(args.model), args.output)
+        print(f"Saved {args.output} ({bundle_size(args.output) / 1024:.1f} KB)")
+    elif args.command == "benchmark":
+        print(benchmark(args.paths, args.repeats).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,20 @@
 import pandas as pd
 
 
-def check_optimization(df):
-    # Calculate the mean of each feature
-    means = df.mean().round(2)
+def check_optimization(df, conditions):
+    # Optimal ranges keyed like the columns of df, from the model registry
 
-    # Define optimal ranges for each feature
-    optimal_conditions = {
-        "temperature_x": (25, 28),
-        "humidity_x": (50, 70),
-        "light_x": (1000, 4000),
-        "pH_x": (6.0, 7.0),
-        "EC_x": (1200, 1800),
-        "TDS_x": (560, 840),
-        "WaterTemp_x": (25, 28),
-    }
+    # Calculate the mean of each feature
+    means = df.mean()
+    if means.dtype == "float32":
+        # Avoid float32 noise such as 27.030000686645508 in the messages
+        means = means.astype(float)
+    means = means.round(2)
 
     # Determine if each feature is within optimal range
     def check_optimal(feature, value):
-        if feature in optimal_conditions:
-            lower, upper = optimal_conditions[feature]
+        if feature in conditions:
+            lower, upper = conditions[feature]
             return lower <= value <= upper
         return True  # Always optimal if no specific range
 
@@ -0,0 +1,202 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from .surrogate import GRID_DAYS
+from .validation import START_DATE
+
+MINUTE = np.int64(60 * 10**9)
+
+BENCHMARK_DATA = "./dataset/dummy_data_test.csv"
+
+
+class DesignCache:
+    """Prophet's seasonality and trend inputs for every minute of a fixed date range.
+
+    Everything ``predict()`` derives from the dates alone, the scaled time
+    ``t`` and the Fourier (and holiday) columns of the feature matrix, is
+    built once for ``days`` days from ``start``. A forecast looks up its
+    rows, fills in the standardized regressor columns and runs the same
+    trend and component arithmetic as Prophet, so the result matches
+    ``predict()`` with ``uncertainty_samples=0`` up to rounding. Futures with dates off
+    the minute grid or outside it are left to Prophet. The cached columns
+    take ``8 * minutes * columns`` bytes, about 13 MB for 80 days of the
+    weekly and daily seasonalities.
+    """
+
+    def __init__(self, model, start=START_DATE, days=GRID_DAYS):
+        if any(props["condition_name"] for props in model.seasonalities.values()):
+            raise ValueError("Conditional seasonalities depend on more than the dates")
+        self.model = model
+        self.names = list(model.extra_regressors)
+
+        start = pd.Timestamp(start)
+        grid = pd.DataFrame(
+            {"ds": pd.date_range(start, start + pd.Timedelta(days=days), freq="min")}
+        )
+        for name in self.names:
+            grid[name] = 0.0
+        if model.logistic_floor:
+            grid["floor"] = 0.0
+        if model.growth == "logistic":
+            grid["cap"] = 1.0
+        grid = model.setup_dataframe(grid)
+        features, _, self.component_cols, _ = model.make_all_seasonality_features(grid)
+
+        self.start = start.value
+        self.minutes = len(grid)
+        self.t = grid["t"].to_numpy()
+        self.columns = list(features.columns)
+        self.regressor_positions = [self.columns.index(name) for name in self.names]
+        self.fixed_positions = [
+            i for i in range(len(self.columns)) if i not in self.regressor_positions
+        ]
+        self.fixed = np.ascontiguousarray(features.to_numpy()[:, self.fixed_positions])
+
+    @property
+    def nbytes(self):
+        return self.fixed.nbytes + self.t.nbytes
+
+    def _rows(self, future):
+        offsets = pd.to_datetime(future["ds"]).to_numpy().view(np.int64) - self.start
+        return offsets // MINUTE, offsets % MINUTE == 0
+
+    def covers(self, future):
+        """Whether every date of ``future`` is a whole minute of the cached range."""
+        if self.model.growth == "logistic" and "cap" not in future:
+            return False
+        rows, whole = self._rows(future)
+        return bool(whole.all() and rows.min() >= 0 and rows.max() < self.minutes)
+
+    def _setup(self, future):
+        # The columns model.setup_dataframe adds, as arrays in date order;
+        # one DataFrame at the end is much cheaper than a column at a time
+        model = self.model
+        rows, _ = self._rows(future)
+        order = np.argsort(rows, kind="stable")
+        columns = {"ds": pd.to_datetime(future["ds"]).to_numpy()[order]}
+        if "cap" in future:
+            columns["cap"] = future["cap"].to_numpy()[order]
+        if model.logistic_floor:
+            floor = future["floor"].to_numpy(dtype=float)[order]
+        elif getattr(model, "scaling", "absmax") == "minmax":
+            floor = np.full(len(rows), model.y_min)
+        else:
+            floor = np.zeros(len(rows))
+        columns["floor"] = floor
+        if model.growth == "logistic":
+            columns["cap_scaled"] = (columns["cap"] - floor) / model.y_scale
+        columns["t"] = self.t[rows[order]]
+        for name in self.names:
+            props = model.extra_regressors[name]
+            values = pd.to_numeric(future[name]).to_numpy(dtype=float)[order]
+            columns[name] = (values - props["mu"]) / props["std"]
+        return columns, rows[order]
+
+    def setup_dataframe(self, future):
+        """The frame ``model.setup_dataframe`` returns for ``future``, from the cache."""
+        columns, _ = self._setup(future)
+        return pd.DataFrame(columns)
+
+    def predict(self, future):
+        """Point forecast of ``future`` with the columns and values of Prophet's ``predict()``."""
+        model = self.model
+        columns, rows = self._setup(future)
+        trend = model.predict_trend(columns)
+
+        X = np.empty((len(rows), len(self.columns)))
+        X[:, self.fixed_positions] = self.fixed[rows]
+        X[:, self.regressor_positions] = np.column_stack(
+            [columns[name] for name in self.names]
+        )
+        forecast = {"ds": columns["ds"], "trend": trend}
+        if "cap" in columns:
+            forecast["cap"] = columns["cap"]
+        if model.logistic_floor:
+            forecast["floor"] = columns["floor"]
+        for component in self.component_cols.columns:
+            beta_c = model.params["beta"] * self.component_cols[component].values
+            comp = np.matmul(X, beta_c.transpose())
+            if component in model.component_modes["additive"]:
+                comp *= model.y_scale
+            forecast[component] = np.nanmean(comp, axis=1)
+        forecast["yhat"] = (
+            trend * (1 + forecast["multiplicative_terms"]) + forecast["additive_terms"]
+        )
+        return pd.DataFrame(forecast)
+
+
+def benchmark(model, design, futures, repeats=5):
+    """Time of Prophet's point forecast against the cache, per batch of futures."""
+    from .uncertainty import point_forecast
+
+    rows = []
+    for label, batch in futures.items():
+        timings = {"prophet": [], "design": []}
+        for _ in range(repeats):
+            start = time.perf_counter()
+            expected = [point_forecast(model, future) for future in batch]
+            timings["prophet"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            forecasts = [point_forecast(model, future, design) for future in batch]
+            timings["design"].append(time.perf_counter() - start)
+
+        difference = max(
+            (forecast["yhat"] - reference["yhat"]).abs().max()
+            for forecast, reference in zip(forecasts, expected)
+        )
+        rows.append(
+            {
+                "futures": label,
+                "prophet_ms": np.median(timings["prophet"]) * 1000,
+                "design_ms": np.median(timings["design"]) * 1000,
+                "max_diff_yhat": difference,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def main():
+    from .model import create_future_dataframe, load_model, prepare_data, resample_data
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark forecasts from the cached design matrix against predict()."
+    )
+    parser.add_argument("--model", default="./model/prophet_model")
+    parser.add_argument("--data", default=BENCHMARK_DATA)
+    parser.add_argument("--cap", type=float, default=18)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    start = time.perf_counter()
+    design = DesignCache(model)
+    print(
+        f"Built {design.minutes} minutes x {len(design.columns)} columns in "
+        f"{time.perf_counter() - start:.2f}s ({design.nbytes / 1024**2:.1f} MB)"
+    )
+
+    df = pd.read_csv(args.data, parse_dates=["datetime"])
+    df_prophet = prepare_data(resample_data(df))
+    futures = {}
+    for periods in (10, 30):
+        future = create_future_dataframe(df_prophet, periods)
+        future["cap"] = args.cap
+        futures[f"1 x {periods} days"] = [future]
+    # One future per hole, as a batch of growers would request them
+    batch = []
+    for hole in sorted(df_prophet["hole"].unique()):
+        future = create_future_dataframe(df_prophet[df_prophet["hole"] == hole], 30)
+        future["cap"] = args.cap
+        batch.append(future)
+    futures[f"{len(batch)} x 30 days"] = batch
+
+    result = benchmark(model, design, futures, args.repeats)
+    print(result.round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import fcntl
+import os
+import pickle
+import tempfile
+import threading
+from contextlib import contextmanager, suppress
+
+import streamlit as st
+
+from .session import MB, content_hash, remember as remember_in_session
+
+# Point every worker or replica at the same volume to share results
+CACHE_DIR = os.environ.get("HYDROSIM_CACHE_DIR", "./cache")
+DISK_CACHE_BUDGET = int(os.environ.get("HYDROSIM_DISK_CACHE_MB", 512)) * MB
+
+# Keys share this many lock files, so the lock directory never grows
+LOCK_STRIPES = 64
+
+# Other processes write too, so every this many writes the size estimate is
+# replaced by a scan of the directory
+RESCAN_WRITES = 64
+
+# Eviction frees down to this share of ``max_bytes``, so the writes that
+# follow do not each trigger another scan
+EVICT_TO = 0.9
+
+_MISSING = object()
+
+
+class DiskCache:
+    """Pickled values in files named by a content hash, shared by every process using ``directory``.
+
+    Writes go to a temporary file that is renamed into place, so readers
+    never see a partial value and need no lock. ``get_or_compute`` holds a
+    file lock per key while computing, so of several workers missing the
+    same key only one computes it. Reads refresh a file's modification
+    time; once the files exceed ``max_bytes`` the least recently used ones
+    are removed.
+    """
+
+    def __init__(self, directory=None, max_bytes=DISK_CACHE_BUDGET):
+        # Looked up per instance, so a load test can point the cache elsewhere
+        self.directory = directory = directory or CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, "locks"), exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+        # Running estimate of the bytes on disk, None until the first scan
+        self._bytes = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.pkl")
+
+    @contextmanager
+    def _file_lock(self, name, blocking=True):
+        with open(os.path.join(self.directory, "locks", name), "a") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return _MISSING
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Written by an incompatible version; drop it and recompute
+            self._remove(path)
+            return _MISSING
+        # Evicted by another process since the load; the value is still good
+        with suppress(FileNotFoundError):
+            os.utime(path)
+        return value
+
+    def get(self, key, default=None):
+        value = self._read(key)
+        self._count("misses" if value is _MISSING else "hits")
+        return default if value is _MISSING else value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            try:
+                replaced = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+        except BaseException:
+            self._remove(tmp)
+            raise
+
+        with self._stats_lock:
+            self.writes += 1
+            if self._bytes is not None:
+                self._bytes += size - replaced
+            due = (
+                self._bytes is None
+                or self._bytes > self.max_bytes
+                or self.writes % RESCAN_WRITES == 0
+            )
+        # Scanning the directory on every write would cost more than the write
+        if due:
+            self.evict()
+        return value
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._file_lock(f"{int(key[:8], 16) % LOCK_STRIPES}.lock"):
+            # Another worker may have computed it while this one waited
+            value = self._read(key)
+            if value is _MISSING:
+                value = self.put(key, compute())
+        return value
+
+    def _entries(self):
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir() or shard.name == "locks":
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".pkl"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Remove the least recently used files once the cache exceeds ``max_bytes``."""
+        # One evicting process at a time is enough; the others skip
+        with self._file_lock("evict.lock", blocking=False) as locked:
+            if not locked:
+                return
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                entries = []
+            for _, size, path in entries:
+                if total <= self.max_bytes * EVICT_TO:
+                    break
+                self._remove(path)
+                total -= size
+                self._count("evictions")
+            with self._stats_lock:
+                self._bytes = total
+
+    def clear(self):
+        """Remove every cached value; the statistics are kept."""
+        for _, _, path in self._entries():
+            self._remove(path)
+        with self._stats_lock:
+            self._bytes = 0
+
+    def stats(self):
+        entries = self._entries()
+        with self._stats_lock:
+            return {
+                "files": len(entries),
+                "total_bytes": sum(size for _, size, _ in entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+
+@st.cache_resource
+def get_disk_cache():
+    """One disk cache handle per server process; the files are shared between processes."""
+    return DiskCache()
+
+
+def remember(key, compute):
+    """Like ``session.remember``, with the shared disk cache between memory and ``compute``.
+
+    ``key`` must describe every input of ``compute``, since other processes
+    reuse the value for the same key.
+    """
+    return remember_in_session(
+        key, lambda: get_disk_cache().get_or_compute(content_hash(*key), compute)
+    )
@@ -0,0 +1,183 @@
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from prophet import Prophet
+from statsmodels.tsa.arima.model import ARIMA
+
+# load_metrics stays importable from here, where it used to live
+from .metrics import METRICS_PATH, load_metrics, save_metrics  # noqa: F401
+from .model import prepare_data, REGRESSORS
+
+TRAIN_PATH = "./dataset/dataset_train_final.csv"
+TEST_PATH = "./dataset/dataset_test_final.csv"
+
+# Same settings as the final models in the notebook
+CAP = 18
+ARIMA_ORDER = (2, 1, 2)
+
+
+def load_dataset(path):
+    df = pd.read_csv(path)
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    df = df.sort_values("datetime", kind="mergesort").reset_index(drop=True)
+
+    # Day number since planting, counted on calendar days
+    first_day = df["datetime"].min().normalize()
+    df["day"] = (df["datetime"].dt.normalize() - first_day).dt.days + 1
+    return df
+
+
+def rolling_origin_folds(df_train, df_test, initial_days=10, horizon_days=5, step_days=5):
+    """Split the data into expanding-window folds.
+
+    Each fold trains on the train file up to ``cutoff`` and is scored on the
+    test file for the ``horizon_days`` that follow it.
+    """
+    last_day = min(df_train["day"].max(), df_test["day"].max())
+
+    folds = []
+    for cutoff in range(initial_days, last_day, step_days):
+        train = df_train[df_train["day"] <= cutoff]
+        test = df_test[
+            (df_test["day"] > cutoff) & (df_test["day"] <= cutoff + horizon_days)
+        ]
+        if len(train) and len(test):
+            folds.append((cutoff, train, test))
+    return folds
+
+
+def _forecast_prophet(train, test):
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    train_prophet = prepare_data(train)
+    train_prophet["cap"] = CAP
+
+    model = Prophet(growth="logistic")
+    for regressor in REGRESSORS:
+        model.add_regressor(regressor)
+    model.fit(train_prophet)
+
+    test_prophet = prepare_data(test)
+    test_prophet["cap"] = CAP
+
+    # Prophet sorts by ds internally, apply the same sort so actuals line up
+    actual = test_prophet.sort_values("ds")["y"].to_numpy(dtype=float)
+    forecast = model.predict(test_prophet.drop(columns="y"))
+    return actual, forecast["yhat"].clip(lower=0).to_numpy()
+
+
+def _forecast_arima(train, test):
+    # One series per hole, like Prophet sees them through the hole regressor;
+    # pooled, the holes' readings would interleave into one series
+    actual, predicted = [], []
+    for hole, test_hole in test.groupby("hole", sort=True):
+        series = train.loc[train["hole"] == hole, "LeafCount"].to_numpy(dtype=float)
+        if not len(series):
+            raise ValueError(f"No training readings for hole {hole}")
+        model = ARIMA(series, order=ARIMA_ORDER).fit()
+        actual.append(test_hole["LeafCount"].to_numpy(dtype=float))
+        predicted.append(model.forecast(steps=len(test_hole)))
+    return np.concatenate(actual), np.clip(np.concatenate(predicted), 0, None)
+
+
+FORECASTERS = {
+    "Prophet": _forecast_prophet,
+    "ARIMA": _forecast_arima,
+}
+
+
+def _run_fold(model_name, cutoff, train, test):
+    actual, predicted = FORECASTERS[model_name](train, test)
+    errors = predicted - actual
+    return {
+        "Model": model_name,
+        "cutoff_day": int(cutoff),
+        "n_train": len(train),
+        "n_test": len(test),
+        "RMSE": float(np.sqrt(np.mean(errors**2))),
+        "MAE": float(np.mean(np.abs(errors))),
+        # Kept so the summary can pool errors over all folds
+        "sse": float(np.sum(errors**2)),
+        "sae": float(np.sum(np.abs(errors))),
+    }
+
+
+def summarize_metrics(fold_metrics):
+    totals = fold_metrics.groupby("Model")[["sse", "sae", "n_test"]].sum()
+    summary = pd.DataFrame(
+        {
+            "RMSE": np.sqrt(totals["sse"] / totals["n_test"]),
+            "MAE": totals["sae"] / totals["n_test"],
+            "Folds": fold_metrics.groupby("Model").size(),
+        }
+    )
+    return summary.round(2).reset_index()
+
+
+def run_backtest(
+    train_path=TRAIN_PATH,
+    test_path=TEST_PATH,
+    initial_days=10,
+    horizon_days=5,
+    step_days=5,
+    n_jobs=-1,
+):
+    df_train = load_dataset(train_path)
+    df_test = load_dataset(test_path)
+    folds = rolling_origin_folds(
+        df_train, df_test, initial_days, horizon_days, step_days
+    )
+
+    # Every (model, fold) pair is independent, so spread them across cores
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_run_fold)(model_name, cutoff, train, test)
+        for model_name in FORECASTERS
+        for cutoff, train, test in folds
+    )
+
+    fold_metrics = pd.DataFrame(results)
+    return summarize_metrics(fold_metrics), fold_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rolling-origin backtest of Prophet vs ARIMA."
+    )
+    parser.add_argument("--train", default=TRAIN_PATH)
+    parser.add_argument("--test", default=TEST_PATH)
+    parser.add_argument("--initial-days", type=int, default=10)
+    parser.add_argument("--horizon-days", type=int, default=5)
+    parser.add_argument("--step-days", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--output", default=METRICS_PATH)
+    args = parser.parse_args()
+
+    config = {
+        "train": args.train,
+        "test": args.test,
+        "initial_days": args.initial_days,
+        "horizon_days": args.horizon_days,
+        "step_days": args.step_days,
+        "arima_order": list(ARIMA_ORDER),
+        "cap": CAP,
+    }
+    summary, fold_metrics = run_backtest(
+        args.train,
+        args.test,
+        args.initial_days,
+        args.horizon_days,
+        args.step_days,
+        args.jobs,
+    )
+    save_metrics(summary, fold_metrics, config, args.output)
+
+    print(fold_metrics.drop(columns=["sse", "sae"]).to_string(index=False))
+    print()
+    print(summary.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
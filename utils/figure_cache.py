@@ -0,0 +1,80 @@
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+import streamlit as st
+
+from .session import MB, content_hash
+
+FIGURE_CACHE_BUDGET = int(os.environ.get("HYDROSIM_FIGURE_CACHE_MB", 64)) * MB
+
+
+class FigureCache:
+    """Plotly figures as JSON, keyed by a hash of their inputs.
+
+    Entries are evicted least-recently-used first once the stored JSON
+    exceeds ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes=FIGURE_CACHE_BUDGET):
+        self.max_bytes = max_bytes
+
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, figure_json):
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= len(self._entries.pop(key))
+            self._entries[key] = figure_json
+            self.total_bytes += len(figure_json)
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "figures": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+@st.cache_resource
+def get_figure_cache():
+    """One figure cache shared by every session of this server process."""
+    return FigureCache()
+
+
+def cached_figure(build, *inputs):
+    """Return ``build(*inputs)``, re-served from its JSON when the inputs were seen before.
+
+    Every call gets its own figure object, so callers may still update it.
+    """
+    cache = get_figure_cache()
+    key = content_hash(build.__name__, *inputs)
+    figure_json = cache.get(key)
+    if figure_json is not None:
+        return pio.from_json(figure_json)
+
+    fig = build(*inputs)
+    cache.put(key, fig.to_json())
+    return fig
@@ -0,0 +1,282 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+
+HISTORY_PATH = os.environ.get("HYDROSIM_HISTORY_PATH", "./model/forecast_history.db")
+# Runs older than this many days, or beyond this many per crop and site, are
+# deleted as new ones are recorded; 0 keeps them
+HISTORY_MAX_DAYS = int(os.environ.get("HYDROSIM_HISTORY_MAX_DAYS", 90))
+HISTORY_MAX_RUNS = int(os.environ.get("HYDROSIM_HISTORY_MAX_RUNS", 1000))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    crop TEXT NOT NULL,
+    site TEXT NOT NULL,
+    hole INTEGER,
+    model_version TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    horizon INTEGER NOT NULL,
+    samples INTEGER,
+    seed INTEGER,
+    cap REAL,
+    freq TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_site ON runs (site, hole, run_date);
+CREATE INDEX IF NOT EXISTS runs_inputs ON runs (input_hash, model_version, horizon);
+CREATE INDEX IF NOT EXISTS runs_retention ON runs (crop, site, created_at);
+CREATE TABLE IF NOT EXISTS points (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    day INTEGER NOT NULL,
+    ds TEXT NOT NULL,
+    yhat REAL NOT NULL,
+    yhat_lower REAL,
+    yhat_upper REAL,
+    PRIMARY KEY (run_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS points_ds ON points (ds);
+"""
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Columns added to runs after the first release, with their types
+ADDED_COLUMNS = {"cap": "REAL", "freq": "TEXT", "source": "TEXT"}
+
+
+class ForecastHistory:
+    """Every forecast run in a local SQLite file, in WAL mode.
+
+    A run stores its model version, input hash, horizon, cap, resample
+    frequency and source (``"model"`` or ``"surrogate"``) and per-day ``yhat``
+    with bounds, indexed by site, hole and run date for the trend and drift
+    views and by input hash to reuse earlier results. WAL lets the sessions
+    of a server read while another one appends; each call opens its own
+    connection, so one instance can be shared between threads. Recording a
+    run deletes the runs of its crop and site older than ``max_days`` or
+    beyond the newest ``max_runs``.
+    """
+
+    def __init__(self, path=None, max_days=None, max_runs=None):
+        # Looked up per instance, so a load test can point the history elsewhere
+        self.path = path = path or HISTORY_PATH
+        self.max_days = HISTORY_MAX_DAYS if max_days is None else max_days
+        self.max_runs = HISTORY_MAX_RUNS if max_runs is None else max_runs
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.executescript(SCHEMA)
+            # Older files lack the newer reuse keys; their runs keep NULLs and
+            # are never reused
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(runs)")}
+            for column, kind in ADDED_COLUMNS.items():
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE runs ADD COLUMN {column} {kind}")
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA foreign_keys = ON")
+        # Durable at every checkpoint, which is enough for a cache of forecasts
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as connection:
+            return pd.read_sql_query(sql, connection, params=params)
+
+    def record(
+        self,
+        forecast,
+        crop,
+        site,
+        model_version,
+        input_hash,
+        samples=None,
+        seed=None,
+        hole=None,
+        cap=None,
+        freq=None,
+        source=None,
+    ):
+        """Append a forecast with ``ds``, ``yhat``, ``yhat_lower`` and ``yhat_upper``; returns its run id."""
+        now = datetime.now()
+        ds = pd.to_datetime(forecast["ds"]).dt.strftime(TIME_FORMAT)
+        run = (
+            now.isoformat(timespec="seconds"),
+            now.date().isoformat(),
+            crop,
+            site,
+            None if hole is None else int(hole),
+            model_version,
+            input_hash,
+            len(forecast),
+            None if samples is None else int(samples),
+            None if seed is None else int(seed),
+            None if cap is None else float(cap),
+            freq,
+            source,
+        )
+        with closing(self._connect()) as connection, connection:
+            run_id = connection.execute(
+                "INSERT INTO runs (created_at, run_date, crop, site, hole, model_version,"
+                " input_hash, horizon, samples, seed, cap, freq, source)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                run,
+            ).lastrowid
+            connection.executemany(
+                "INSERT INTO points VALUES (?, ?, ?, ?, ?, ?)",
+                zip(
+                    [run_id] * len(forecast),
+                    range(1, len(forecast) + 1),
+                    ds.tolist(),
+                    forecast["yhat"].tolist(),
+                    forecast["yhat_lower"].tolist(),
+                    forecast["yhat_upper"].tolist(),
+                ),
+            )
+            self._prune(connection, crop, site, now)
+        return run_id
+
+    def _prune(self, connection, crop, site, now):
+        # Per crop and site, so a busy greenhouse does not push out the others;
+        # points go with their runs through the foreign key
+        if self.max_days:
+            cutoff = now - pd.Timedelta(days=self.max_days)
+            connection.execute(
+                "DELETE FROM runs WHERE crop = ? AND site = ? AND created_at < ?",
+                (crop, site, cutoff.isoformat(timespec="seconds")),
+            )
+        if self.max_runs:
+            # NULL when there are at most max_runs, which deletes nothing
+            connection.execute(
+                "DELETE FROM runs WHERE crop = ? AND site = ? AND id <= ("
+                " SELECT id FROM runs WHERE crop = ? AND site = ?"
+                " ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (crop, site, crop, site, self.max_runs),
+            )
+
+    def clear(self):
+        """Delete every stored run and its points."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM runs")
+
+    def forecast(self, run_id):
+        """The per-day forecast of one run."""
+        forecast = self._query(
+            "SELECT ds, yhat, yhat_lower, yhat_upper FROM points WHERE run_id = ? ORDER BY day",
+            (run_id,),
+        )
+        forecast["ds"] = pd.to_datetime(forecast["ds"])
+        return forecast
+
+    def find(
+        self,
+        crop,
+        site,
+        model_version,
+        input_hash,
+        horizon,
+        samples=None,
+        seed=None,
+        cap=None,
+        freq=None,
+        source=None,
+    ):
+        """Latest stored forecast of the same model, inputs and settings, or None."""
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT id FROM runs WHERE input_hash = ? AND model_version = ?"
+                " AND horizon = ? AND crop = ? AND site = ? AND samples IS ? AND seed IS ?"
+                " AND cap IS ? AND freq IS ? AND source IS ? ORDER BY id DESC LIMIT 1",
+                (
+                    input_hash,
+                    model_version,
+                    int(horizon),
+                    crop,
+                    site,
+                    samples,
+                    seed,
+                    None if cap is None else float(cap),
+                    freq,
+                    source,
+                ),
+            ).fetchone()
+        return None if row is None else self.forecast(row[0])
+
+    @staticmethod
+    def _filters(crop, site, hole, since, until, input_hash=None):
+        # Only the given filters, so the (site, hole, run_date) index stays usable
+        clauses, params = [], []
+        for column, value in (
+            ("crop", crop),
+            ("site", site),
+            ("hole", hole),
+            ("input_hash", input_hash),
+        ):
+            if value is not None:
+                clauses.append(f"runs.{column} = ?")
+                params.append(int(value) if column == "hole" else value)
+        if since is not None:
+            clauses.append("runs.run_date >= ?")
+            params.append(str(pd.Timestamp(since).date()))
+        if until is not None:
+            clauses.append("runs.run_date <= ?")
+            params.append(str(pd.Timestamp(until).date()))
+        return " AND ".join(clauses) or "1", params
+
+    def runs(
+        self, crop=None, site=None, hole=None, since=None, until=None, input_hash=None
+    ):
+        """Stored runs, newest first."""
+        where, params = self._filters(crop, site, hole, since, until, input_hash)
+        return self._query(f"SELECT * FROM runs WHERE {where} ORDER BY id DESC", params)
+
+    def trend(
+        self,
+        crop=None,
+        site=None,
+        hole=None,
+        day=None,
+        since=None,
+        until=None,
+        input_hash=None,
+    ):
+        """One row per run with its forecast on horizon ``day`` (default: its last day)."""
+        where, params = self._filters(crop, site, hole, since, until, input_hash)
+        trend = self._query(
+            "SELECT runs.id AS run_id, runs.created_at, runs.model_version, runs.source,"
+            " points.ds, points.yhat, points.yhat_lower, points.yhat_upper"
+            " FROM runs JOIN points ON points.run_id = runs.id"
+            f" WHERE {where} AND points.day = COALESCE(?, runs.horizon) ORDER BY runs.id",
+            params + [day],
+        )
+        trend["ds"] = pd.to_datetime(trend["ds"])
+        # An empty result comes back with object columns
+        trend["run_id"] = trend["run_id"].astype("int64")
+        return trend
+
+    def drift(
+        self, crop=None, site=None, hole=None, since=None, until=None, input_hash=None
+    ):
+        """Every stored prediction per target date, with its change since the first run.
+
+        With ``input_hash`` only runs on the same input data are compared, so
+        the change comes from the model, horizon or settings alone.
+        """
+        where, params = self._filters(crop, site, hole, since, until, input_hash)
+        drift = self._query(
+            "SELECT runs.id AS run_id, runs.created_at, runs.model_version, runs.source,"
+            " points.ds, points.yhat, points.yhat_lower, points.yhat_upper"
+            " FROM runs JOIN points ON points.run_id = runs.id"
+            f" WHERE {where} ORDER BY points.ds, runs.id",
+            params,
+        )
+        drift["ds"] = pd.to_datetime(drift["ds"])
+        drift["run_id"] = drift["run_id"].astype("int64")
+        drift["drift"] = drift["yhat"] - drift.groupby("ds")["yhat"].transform("first")
+        return drift
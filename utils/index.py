@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+DAY = np.int64(24 * 60 * 60 * 10**9)
+
+
+class SensorIndex:
+    """Sensor readings sorted by (hole, datetime), with row offsets per hole and per day.
+
+    ``day`` counts whole days since the first reading (day 1 is its first 24
+    hours), the numbering the charts use. ``offsets[i, d]`` is the first row
+    of the i-th hole at or after the start of day ``d + 1``, so a hole and day
+    range is one contiguous slice found by lookup, and a time range within a
+    hole by a binary search over its timestamps. ``frame`` carries the
+    ``day`` column, so slices can go straight to the visualization and
+    forecasting helpers.
+    """
+
+    def __init__(self, df):
+        timestamps = pd.to_datetime(df["datetime"]).to_numpy().view(np.int64)
+        hole = df["hole"].to_numpy()
+        order = np.lexsort((timestamps, hole))
+        self.timestamps = timestamps[order]
+        self.hole = hole[order]
+
+        self.start = self.timestamps.min()
+        day = (self.timestamps - self.start) // DAY + 1
+        self.frame = df.iloc[order].reset_index(drop=True)
+        self.frame["day"] = day
+        self.n_days = int(day.max())
+        # Calendar dates with at least one reading
+        self.n_dates = len(np.unique(self.timestamps // DAY))
+        # Back to time order; ties keep the hole order
+        self.time_order = np.argsort(self.timestamps, kind="stable")
+
+        starts = np.flatnonzero(np.r_[True, self.hole[1:] != self.hole[:-1]])
+        stops = np.r_[starts[1:], len(self.hole)]
+        self.holes = self.hole[starts].tolist()
+        self._positions = {hole: i for i, hole in enumerate(self.holes)}
+        day_starts = self.start + DAY * np.arange(self.n_days + 1)
+        self.offsets = np.stack(
+            [
+                start + np.searchsorted(self.timestamps[start:stop], day_starts)
+                for start, stop in zip(starts, stops)
+            ]
+        )
+        self.offsets[:, -1] = stops
+
+    def rows(self, hole=None, days=None):
+        """Row positions of ``hole`` (every hole if None) on days ``(first, last)``, both included.
+
+        One hole gives a slice, several holes an array of positions.
+        """
+        first, last = days or (1, self.n_days)
+        first = int(np.clip(first, 1, self.n_days + 1))
+        last = int(np.clip(last, first - 1, self.n_days))
+        if hole is not None:
+            offsets = self.offsets[self._positions[hole]]
+            return slice(int(offsets[first - 1]), int(offsets[last]))
+        spans = self.offsets[:, [first - 1, last]]
+        return np.concatenate([np.arange(start, stop) for start, stop in spans])
+
+    def select(self, hole=None, days=None):
+        """Readings of ``hole`` on days ``(first, last)``, e.g. ``select(3, (10, 15))``."""
+        return self.frame.iloc[self.rows(hole, days)]
+
+    def between(self, hole, start, end):
+        """Readings of ``hole`` with ``start <= datetime < end``."""
+        first, stop = self.offsets[self._positions[hole], [0, -1]]
+        bounds = pd.to_datetime([start, end]).to_numpy().view(np.int64)
+        rows = first + np.searchsorted(self.timestamps[first:stop], bounds)
+        return self.frame.iloc[rows[0] : rows[1]]
+
+    def last_readings(self):
+        """The latest reading of every hole."""
+        return self.frame.iloc[self.offsets[:, -1] - 1]
+
+    def latest(self):
+        """The latest reading over all holes."""
+        last = self.offsets[:, -1] - 1
+        times = self.timestamps[last]
+        return self.frame.iloc[last[np.flatnonzero(times == times.max())[-1]]]
+
+    def chronological(self):
+        """``frame`` in time order, as the readings were logged."""
+        return self.frame.iloc[self.time_order]
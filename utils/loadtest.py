@@ -0,0 +1,292 @@
+import argparse
+import logging
+import os
+import resource
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from .session import MB, get_manager
+
+HOME_PAGE = "Home.py"
+FORECAST_PAGE = "pages/2-Forecasting.py"
+RUN_TIMEOUT = 600
+
+EXAMPLE_OPTION = "Gunakan contoh file CSV"
+DAY_SLIDER = "⏳ Pilih hari untuk Forecasting pertumbuhan daun"
+FEATURE_SELECTBOX = "🎯 Pilih fitur untuk divisualisasikan:"
+PREDICT_BUTTON = "Predict"
+
+# Page runs of one complete flow, in order
+FLOW_STEPS = ("home", "forecasting", "upload", "slider", "selectbox", "predict")
+
+
+def read_memory(pid="self"):
+    """Resident and proportional set size of a process in bytes, read from /proc."""
+    memory = {"rss": 0, "pss": 0}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    memory["rss"] = int(line.split()[1]) * 1024
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    memory["pss"] = int(line.split()[1]) * 1024
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return memory
+
+
+def _find(widgets, label):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No widget labelled {label!r} on the page")
+
+
+def _step(record, name, app):
+    start = time.perf_counter()
+    error = None
+    try:
+        app.run()
+        if app.exception:
+            error = app.exception[0].value
+    except Exception as e:
+        error = repr(e)
+    record.append({"step": name, "seconds": time.perf_counter() - start, "error": error})
+    return error is None
+
+
+def run_session(rng, timeout=RUN_TIMEOUT):
+    """One grower: open Home, load the example CSV, move the day slider, pick a
+    feature and press Predict. Returns the latency of every page run."""
+    from streamlit.testing.v1 import AppTest
+
+    record = []
+    if not _step(record, "home", AppTest.from_file(HOME_PAGE, default_timeout=timeout)):
+        return record
+
+    app = AppTest.from_file(FORECAST_PAGE, default_timeout=timeout)
+    if not _step(record, "forecasting", app):
+        return record
+    # The file uploader cannot be driven headlessly, the example CSV goes
+    # through the same read/validate/screen path
+    _find(app.radio, "Pilih metode input data:").set_value(EXAMPLE_OPTION)
+    if not _step(record, "upload", app):
+        return record
+
+    slider = _find(app.slider, DAY_SLIDER)
+    slider.set_value(int(rng.integers(slider.min, slider.max + 1)))
+    if not _step(record, "slider", app):
+        return record
+
+    selectbox = _find(app.selectbox, FEATURE_SELECTBOX)
+    selectbox.set_value(rng.choice(selectbox.options))
+    if not _step(record, "selectbox", app):
+        return record
+
+    _find(app.button, PREDICT_BUTTON).click()
+    _step(record, "predict", app)
+    return record
+
+
+@contextmanager
+def _shared_runtime():
+    # AppTest installs a mock Runtime singleton for each run and removes it
+    # when the run ends, which pulls it out from under sessions running at
+    # the same time. One Runtime for all sessions, as in a server.
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import (
+        MemoryCacheStorageManager,
+    )
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    # AppTest touches session state from the session threads before their
+    # script runs start, which Streamlit would warn about once per session
+    logging.getLogger("streamlit.runtime.scriptrunner.script_run_context").setLevel(
+        logging.ERROR
+    )
+    # Each run also patches this option and restores whatever it found, so
+    # overlapping runs could leave it unset while others still need it
+    get_option = build_mock_config_get_option({"global.appTest": True})
+    with mock.patch.object(Runtime, "instance", classmethod(lambda cls: runtime)):
+        with mock.patch.object(Runtime, "exists", classmethod(lambda cls: True)):
+            with mock.patch.object(config, "get_option", get_option):
+                yield
+
+
+def _session_worker(index, flows, seed, start_event, results):
+    rng = np.random.default_rng([seed, index])
+    start_event.wait()
+    records = []
+    for flow in range(flows):
+        for row in run_session(rng):
+            records.append({"session": index, "flow": flow, **row})
+    results[index] = records
+
+
+def _sample_memory(stop, peaks, interval):
+    while not stop.is_set():
+        memory = read_memory()
+        peaks["rss"] = max(peaks["rss"], memory["rss"])
+        peaks["pss"] = max(peaks["pss"], memory["pss"])
+        stop.wait(interval)
+
+
+def run_level(sessions, flows=1, seed=0, interval=0.1):
+    """Run ``sessions`` concurrent sessions of ``flows`` flows each.
+
+    Every session is a thread of this process, as the sessions of one
+    Streamlit server are: they share its GIL, the models and figures held
+    by ``st.cache_resource`` and the session memory budget, while each
+    AppTest keeps its own session id and so its own per-session cache.
+    Memory is the peak RSS and PSS of this one process.
+    """
+    start_event = threading.Event()
+    results = [None] * sessions
+    workers = [
+        threading.Thread(
+            target=_session_worker,
+            args=(index, flows, seed, start_event, results),
+            daemon=True,
+        )
+        for index in range(sessions)
+    ]
+    for worker in workers:
+        worker.start()
+
+    stop = threading.Event()
+    peaks = {"rss": 0, "pss": 0}
+    sampler = threading.Thread(
+        target=_sample_memory, args=(stop, peaks, interval), daemon=True
+    )
+    sampler.start()
+
+    cpu_start = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    with _shared_runtime():
+        start_event.set()
+        for worker in workers:
+            worker.join()
+    wall_seconds = time.perf_counter() - start
+    cpu_end = resource.getrusage(resource.RUSAGE_SELF)
+    stop.set()
+    sampler.join()
+    # Per-session caches of this level belong to no later one
+    get_manager().clear()
+
+    records = pd.DataFrame([row for records in results for row in records])
+    records["sessions"] = sessions
+    failed = records["error"].notna()
+    completed = records[~failed].groupby(["session", "flow"])["step"].count()
+    seconds = records.loc[~failed, "seconds"].to_numpy()
+    cpu_seconds = (cpu_end.ru_utime - cpu_start.ru_utime) + (
+        cpu_end.ru_stime - cpu_start.ru_stime
+    )
+
+    summary = {
+        "sessions": sessions,
+        "runs": len(records),
+        "errors": int(failed.sum()),
+        "p50_ms": np.percentile(seconds, 50) * 1000 if len(seconds) else np.nan,
+        "p95_ms": np.percentile(seconds, 95) * 1000 if len(seconds) else np.nan,
+        "p99_ms": np.percentile(seconds, 99) * 1000 if len(seconds) else np.nan,
+        "flows_per_min": (completed == len(FLOW_STEPS)).sum() / wall_seconds * 60,
+        "runs_per_s": (~failed).sum() / wall_seconds,
+        "cpu_percent": cpu_seconds / wall_seconds * 100,
+        "rss_peak_mb": peaks["rss"] / MB,
+        "pss_peak_mb": peaks["pss"] / MB,
+        "wall_s": wall_seconds,
+    }
+    return summary, records
+
+
+def run_load_test(levels, flows=1, seed=0, warmup=True):
+    """Latency, throughput, CPU and memory of the app at each concurrency level.
+
+    The disk cache and the forecast history live in a temporary directory
+    for the run and are emptied after the warm-up, so the sessions do not
+    reuse results of earlier runs or of the warm-up. Returns one summary row
+    per level and every page run as a record.
+    """
+    import streamlit as st
+
+    from . import disk_cache, history
+
+    paths = disk_cache.CACHE_DIR, history.HISTORY_PATH
+    with tempfile.TemporaryDirectory(prefix="hydrosim-loadtest-") as directory:
+        disk_cache.CACHE_DIR = os.path.join(directory, "cache")
+        history.HISTORY_PATH = os.path.join(directory, "forecast_history.db")
+        # Handles opened before the run would still point at the real files
+        st.cache_resource.clear()
+        try:
+            if warmup:
+                # Imports, the model registry, the quality model and the figure
+                # cache load once here, as they would for a server's first user
+                rng = np.random.default_rng(seed)
+                errors = [row["error"] for row in run_session(rng)]
+                if any(errors):
+                    raise RuntimeError(
+                        f"Warm-up session failed: {next(filter(None, errors))}"
+                    )
+                get_manager().clear()
+                disk_cache.DiskCache().clear()
+                history.ForecastHistory().clear()
+
+            summaries, records = [], []
+            for sessions in levels:
+                summary, level_records = run_level(sessions, flows, seed)
+                summaries.append(summary)
+                records.append(level_records)
+        finally:
+            disk_cache.CACHE_DIR, history.HISTORY_PATH = paths
+    return pd.DataFrame(summaries), pd.concat(records, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test the Streamlit pages with concurrent headless sessions."
+    )
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--flows", type=int, default=1, help="Flows per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-warmup", action="store_true")
+    parser.add_argument("--output", help="Write every page run to this CSV file")
+    args = parser.parse_args()
+
+    summary, records = run_load_test(
+        args.sessions, args.flows, args.seed, warmup=not args.no_warmup
+    )
+    print(summary.round(1).to_string(index=False))
+    print("\np95 latency per step (ms):")
+    steps = records[records["error"].isna()].pivot_table(
+        index="step",
+        columns="sessions",
+        values="seconds",
+        aggfunc=lambda seconds: np.percentile(seconds, 95) * 1000,
+        sort=False,
+    )
+    print(steps.round(0).to_string())
+    if records["error"].notna().any():
+        print("\nErrors:")
+        errors = records.loc[records["error"].notna(), ["sessions", "step", "error"]]
+        print(errors.to_string(index=False))
+    if args.output:
+        records.to_csv(args.output, index=False)
+        print(f"\nWrote {len(records)} page runs to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+# Read by the home page, which should not pay for importing Prophet and
+# statsmodels through utils.evaluation just to show the stored results
+METRICS_PATH = "./model/evaluation_metrics.json"
+
+
+def save_metrics(summary, fold_metrics, config, path=METRICS_PATH):
+    payload = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "config": config,
+        "summary": summary.to_dict(orient="records"),
+        "folds": fold_metrics.drop(columns=["sse", "sae"]).to_dict(orient="records"),
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+
+
+def load_metrics(path=METRICS_PATH):
+    """Return the cached summary table and its metadata, or None if not computed yet."""
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        payload = json.load(f)
+    return pd.DataFrame(payload["summary"]), payload
@@ -1,3 +1,5 @@
+import os
+
 from prophet import Prophet
 import pandas as pd
 import joblib
@@ -6,6 +8,25 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 import streamlit as st
 
+from .bundle import is_bundle, load_bundle
+from .uncertainty import predict_with_intervals
+
+# Extra regressors the Prophet model was trained with
+REGRESSORS = [
+    "hole",
+    "temperature",
+    "humidity",
+    "light",
+    "pH",
+    "EC",
+    "TDS",
+    "WaterTemp",
+]
+
+# The bundled copy is preferred so the app also runs offline
+QUALITY_DATA_PATH = "./dataset/dataset_model_kualitas.csv"
+QUALITY_DATA_URL = "https://raw.githubusercontent.com/Vinzzztty/Forecasting-Hidroponik/refs/heads/V2/dataset/dataset_model_kualitas.csv"
+
 
 def prepare_data(df):
     df_prophet = df[
@@ -30,7 +51,42 @@ def prepare_data(df):
     return df_prophet
 
 
+# How each column is aggregated by resample_data
+RESAMPLE_REDUCERS = {
+    "datetime": "max",
+    "LeafCount": "max",
+    "temperature": "mean",
+    "humidity": "mean",
+    "light": "mean",
+    "pH": "mean",
+    "EC": "mean",
+    "TDS": "mean",
+    "WaterTemp": "mean",
+}
+
+
+def resample_data(df, freq="D", reducers=None):
+    # Aggregate the readings of every hole to one row per period in a single
+    # groupby, each row keeps the time of its last reading as 'datetime'
+    reducers = {**RESAMPLE_REDUCERS, **(reducers or {})}
+    reducers = {col: func for col, func in reducers.items() if col in df.columns}
+
+    bins = df["datetime"].dt.floor(freq).rename("period")
+    df_resampled = (
+        df.groupby([df["hole"], bins], sort=False)
+        .agg(reducers)
+        .reset_index(level="hole")
+        .sort_values(["datetime", "hole"], kind="mergesort")
+        .reset_index(drop=True)
+    )
+
+    return df_resampled[[col for col in df.columns if col in df_resampled.columns]]
+
+
 def load_model(model_path):
+    # Slim bundle directories (see utils.bundle) or legacy joblib pickles
+    if is_bundle(model_path):
+        return load_bundle(model_path)
     model_loaded = joblib.load(model_path)
 
     return model_loaded
@@ -38,25 +94,28 @@ def load_model(model_path):
 
 def create_future_dataframe(df_test, periods):
     future_dates = pd.date_range(start=df_test["ds"].max(), periods=periods, freq="D")
-    last_row = df_test.iloc[-1]
+
+    # Latest reading, so frames that are not sorted by time work as well
+    last_row = df_test.iloc[(df_test["ds"] == df_test["ds"].max()).to_numpy().nonzero()[0][-1]]
 
     future = pd.DataFrame({"ds": future_dates})
-    for col in [
-        "hole",
-        "temperature",
-        "humidity",
-        "light",
-        "pH",
-        "EC",
-        "TDS",
-        "WaterTemp",
-    ]:
+    for col in REGRESSORS:
         future[col] = last_row[col]
     return future
 
 
-def make_predictions(model, future):
-    forecast = model.predict(future)
+def make_predictions(
+    model, future, uncertainty_samples=None, seed=0, surrogate=None, design=None
+):
+    # uncertainty_samples trades interval accuracy for latency: None keeps the
+    # model's own count, 0 skips the intervals (bounds then equal yhat)
+    if surrogate is not None:
+        # The lookup table falls back to the model outside its grid
+        forecast = surrogate.predict(future, uncertainty_samples, seed, design)
+    else:
+        forecast = predict_with_intervals(
+            model, future, uncertainty_samples, seed, design
+        )
     forecast[["yhat", "yhat_lower", "yhat_upper"]] = forecast[
         ["yhat", "yhat_lower", "yhat_upper"]
     ].clip(lower=0)
@@ -65,8 +124,10 @@ def make_predictions(model, future):
 
 def quality_model():
     # Load the dataset
-    url = "https://raw.githubusercontent.com/Vinzzztty/Forecasting-Hidroponik/refs/heads/V2/dataset/dataset_model_kualitas.csv"
-    data = pd.read_csv(url)
+    if os.path.exists(QUALITY_DATA_PATH):
+        data = pd.read_csv(QUALITY_DATA_PATH)
+    else:
+        data = pd.read_csv(QUALITY_DATA_URL)
 
     # Define feature columns and target column
     feature_columns = [
@@ -104,23 +165,24 @@ def quality_model():
     return model, accuracy
 
 
-def predict_pattern(model, input_data):
-    # Define the mapping from pattern values to descriptive labels and images
-    pattern_mapping = {
-        1: (
-            "Pattern 1: Normal",
-            "https://github.com/Vinzzztty/Forecasting-Hidroponik/blob/V2/assets/normal.png?raw=true",
-        ),
-        2: (
-            "Pattern 2: Ideal",
-            "https://github.com/Vinzzztty/Forecasting-Hidroponik/blob/V2/assets/optimal.png?raw=true",
-        ),
-        3: (
-            "Pattern 3: Over",
-            "https://github.com/Vinzzztty/Forecasting-Hidroponik/blob/V2/assets/over.png?raw=true",
-        ),
-    }
+# Define the mapping from pattern values to descriptive labels and images
+PATTERN_MAPPING = {
+    1: (
+        "Pattern 1: Normal",
+        "https://github.com/Vinzzztty/Forecasting-Hidroponik/blob/V2/assets/normal.png?raw=true",
+    ),
+    2: (
+        "Pattern 2: Ideal",
+        "https://github.com/Vinzzztty/Forecasting-Hidroponik/blob/V2/assets/optimal.png?raw=true",
+    ),
+    3: (
+        "Pattern 3: Over",
+        "https://github.com/Vinzzztty/Forecasting-Hidroponik/blob/V2/assets/over.png?raw=true",
+    ),
+}
 
+
+def predict_pattern(model, input_data):
     # Ensure the input_data is a DataFrame
     if isinstance(input_data, dict):
         input_data = pd.DataFrame([input_data])
@@ -129,7 +191,7 @@ def predict_pattern(model, input_data):
     prediction = model.predict(input_data)[0]
 
     # Map the prediction to its descriptive label and image URL
-    prediction_label, image_url = pattern_mapping.get(
+    prediction_label, image_url = PATTERN_MAPPING.get(
         prediction, ("Unknown Pattern", None)
     )
 
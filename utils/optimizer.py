@@ -0,0 +1,89 @@
+import numpy as np
+from joblib import Parallel, delayed
+
+from .scenario import scenario_basis, apply_scenarios
+
+
+def optimal_bounds(entry):
+    """Optimal ranges of a registry entry (``registry.entry(crop, site)``) as tuples."""
+    return {name: tuple(bounds) for name, bounds in entry["optimal_conditions"].items()}
+
+
+def optimize_setpoints(
+    model,
+    df_prophet,
+    day,
+    bounds,
+    budget=5000,
+    batch_size=250,
+    elite_fraction=0.1,
+    patience=3,
+    tol=1e-3,
+    n_jobs=1,
+    seed=0,
+    cap=18,
+    surrogate=None,
+    design=None,
+):
+    """Search regressor setpoints within ``bounds`` that maximise forecast LeafCount on ``day``.
+
+    ``bounds`` maps raw regressor names to ranges, usually ``optimal_bounds``
+    of the model's registry entry.
+
+    Uses the cross-entropy method: every iteration samples a batch of
+    candidates, scores them in one batched forecast, and narrows the sampling
+    distribution around the best ones. Stops when ``budget`` evaluations are
+    used or the best forecast improves less than ``tol`` for ``patience``
+    iterations in a row.
+    """
+    names = list(bounds)
+    low = np.array([bounds[name][0] for name in names], dtype=float)
+    high = np.array([bounds[name][1] for name in names], dtype=float)
+
+    basis = scenario_basis(model, df_prophet, day, names, cap, surrogate, design)
+    baseline = float(apply_scenarios(basis, basis["base_values"][None, :])[0, -1])
+
+    def evaluate(candidates):
+        # Split the batch across workers, each scoring its chunk in one pass
+        chunks = np.array_split(candidates, max(1, min(n_jobs, len(candidates))))
+        scores = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(apply_scenarios)(basis, chunk) for chunk in chunks
+        )
+        return np.concatenate(scores)[:, -1]
+
+    rng = np.random.default_rng(seed)
+    mean = (low + high) / 2
+    std = (high - low) / 2
+    n_elite = max(1, int(batch_size * elite_fraction))
+
+    best_value, best_score = None, -np.inf
+    evaluations, iterations, stale = 0, 0, 0
+    while evaluations < budget and stale < patience:
+        size = min(batch_size, budget - evaluations)
+        if iterations == 0:
+            candidates = rng.uniform(low, high, size=(size, len(names)))
+        else:
+            candidates = np.clip(rng.normal(mean, std, size=(size, len(names))), low, high)
+
+        scores = evaluate(candidates)
+        evaluations += size
+        iterations += 1
+
+        elite = candidates[np.argsort(scores)[-n_elite:]]
+        mean, std = elite.mean(axis=0), elite.std(axis=0) + 1e-9 * (high - low)
+
+        top = int(np.argmax(scores))
+        if scores[top] > best_score + tol:
+            best_value, best_score = candidates[top], float(scores[top])
+            stale = 0
+        else:
+            stale += 1
+
+    return {
+        "setpoints": dict(zip(names, np.round(best_value, 2).tolist())),
+        "forecast": best_score,
+        "baseline": baseline,
+        "gain": best_score - baseline,
+        "evaluations": evaluations,
+        "iterations": iterations,
+    }
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from .bundle import bundle_size, bundle_version
+from .design import DesignCache
+from .model import load_model
+
+REGISTRY_PATH = "./model/registry.json"
+MODEL_BUDGET = int(os.environ.get("HYDROSIM_MODEL_BUDGET_MB", 256)) * 1024 * 1024
+
+
+class ModelRegistry:
+    """Maps (crop, site) to its Prophet artifact, cap and optimal ranges.
+
+    Models are loaded on first use and kept in an LRU; once the loaded
+    models and their cached designs exceed ``memory_budget`` bytes the least
+    recently used ones are dropped and reloaded on their next lookup.
+    """
+
+    def __init__(self, entries, memory_budget=MODEL_BUDGET):
+        self.entries = {(entry["crop"], entry["site"]): entry for entry in entries}
+        self.memory_budget = memory_budget
+
+        self.loaded_bytes = 0
+        self.loads = 0
+        self.evictions = 0
+        self._models = OrderedDict()
+        self._versions = {}
+        self._designs = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path=REGISTRY_PATH, memory_budget=MODEL_BUDGET):
+        with open(path) as f:
+            return cls(json.load(f)["models"], memory_budget)
+
+    def keys(self):
+        return list(self.entries)
+
+    def entry(self, crop, site):
+        """Cap, optimal ranges and artifact path of a (crop, site)."""
+        try:
+            return self.entries[(crop, site)]
+        except KeyError:
+            raise KeyError(f"No model registered for crop={crop!r}, site={site!r}")
+
+    def get(self, crop, site):
+        """The fitted model of a (crop, site), loading it if needed."""
+        key = (crop, site)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+
+        entry = self.entry(crop, site)
+        model = load_model(entry["path"])
+        # Artifact size on disk is a cheap proxy for the loaded model's size
+        size = bundle_size(entry["path"])
+
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = (model, size)
+                self.loaded_bytes += size
+                self.loads += 1
+            self._evict()
+            return self._models[key][0]
+
+    def _evict(self):
+        # Caller holds the lock; a model's design goes with it
+        while self.loaded_bytes > self.memory_budget and len(self._models) > 1:
+            evicted, (_, evicted_size) = self._models.popitem(last=False)
+            self.loaded_bytes -= evicted_size
+            design = self._designs.pop(evicted, None)
+            if design is not None:
+                self.loaded_bytes -= design.nbytes
+            self.evictions += 1
+
+    def version(self, crop, site):
+        """Content hash of a (crop, site) artifact, computed once per registry."""
+        key = (crop, site)
+        with self._lock:
+            if key not in self._versions:
+                self._versions[key] = bundle_version(self.entry(crop, site)["path"])
+            return self._versions[key]
+
+    def design(self, crop, site):
+        """Cached seasonality features of a (crop, site) model, built once while it stays loaded.
+
+        None for models whose features depend on more than the dates.
+        """
+        key = (crop, site)
+        with self._lock:
+            if key in self._designs:
+                return self._designs[key]
+        model = self.get(crop, site)
+        try:
+            design = DesignCache(model)
+        except ValueError:
+            design = None
+        with self._lock:
+            if key in self._designs:
+                return self._designs[key]
+            # Evicted while the design was built, it would never be dropped
+            if key not in self._models:
+                return design
+            self._designs[key] = design
+            if design is not None:
+                self.loaded_bytes += design.nbytes
+            self._models.move_to_end(key)
+            self._evict()
+            return design
+
+    def stats(self):
+        with self._lock:
+            return {
+                "registered": len(self.entries),
+                "loaded": len(self._models),
+                "loaded_bytes": self.loaded_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+def register_model(crop, site, path, cap, registry_path=REGISTRY_PATH):
+    """Point (crop, site) at a new artifact; new sites copy the crop's optimal ranges."""
+    with open(registry_path) as f:
+        payload = json.load(f)
+
+    entries = payload["models"]
+    for entry in entries:
+        if (entry["crop"], entry["site"]) == (crop, site):
+            entry.update(path=path, cap=cap)
+            break
+    else:
+        template = next((entry for entry in entries if entry["crop"] == crop), {})
+        entries.append(
+            {
+                "crop": crop,
+                "site": site,
+                "path": path,
+                "cap": cap,
+                "optimal_conditions": template.get("optimal_conditions", {}),
+            }
+        )
+
+    with open(registry_path, "w") as f:
+        json.dump(payload, f, indent=2)
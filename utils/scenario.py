@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from prophet.utilities import regressor_coefficients
+
+from .model import create_future_dataframe
+from .uncertainty import point_forecast
+
+
+def build_scenario_grid(grid):
+    """Expand ``{regressor: values}`` into one row per combination."""
+    names = list(grid)
+    mesh = np.meshgrid(
+        *[np.asarray(grid[name], dtype=float) for name in names], indexing="ij"
+    )
+    return pd.DataFrame({name: values.ravel() for name, values in zip(names, mesh)})
+
+
+def scenario_basis(
+    model, df_prophet, periods, names, cap=18, surrogate=None, design=None
+):
+    """Run the base forecast once so any number of scenarios can be applied to it.
+
+    With a ``surrogate`` of ``model`` the base forecast comes from its lookup
+    table whenever the future lies on its grid, otherwise from the model,
+    using the cached seasonality features of ``design`` if given.
+    """
+    unknown = sorted(set(names) - set(model.extra_regressors))
+    if unknown:
+        raise ValueError(f"Unknown regressors: {unknown}")
+
+    future = create_future_dataframe(df_prophet, periods)
+    future["cap"] = cap
+    if surrogate is not None:
+        base = surrogate.predict(future, uncertainty_samples=0, design=design)
+    else:
+        base = point_forecast(model, future, design)
+
+    coefs = regressor_coefficients(model).set_index("regressor").loc[list(names)]
+    return {
+        "names": list(names),
+        "ds": base["ds"],
+        "yhat": base["yhat"].to_numpy(),
+        "trend": base["trend"].to_numpy(),
+        "base_values": future.loc[0, list(names)].to_numpy(dtype=float),
+        "coef": coefs["coef"].to_numpy(),
+        "additive": (coefs["regressor_mode"] == "additive").to_numpy(),
+    }
+
+
+def apply_scenarios(basis, values):
+    """Forecast for an ``(n_scenarios, n_regressors)`` array of regressor values."""
+    additive = basis["additive"]
+    coef = basis["coef"]
+
+    # Regressors enter Prophet linearly, so every scenario is the base
+    # forecast shifted by its regressor deltas times the fitted coefficients
+    delta = np.asarray(values, dtype=float) - basis["base_values"]
+    yhat = basis["yhat"][None, :] + (delta[:, additive] @ coef[additive])[:, None]
+    if not additive.all():
+        # Multiplicative regressors scale with the trend
+        yhat += np.outer(delta[:, ~additive] @ coef[~additive], basis["trend"])
+
+    return np.clip(yhat, 0, None).astype(np.float32)
+
+
+def forecast_scenarios(
+    model, df_prophet, periods, scenarios, cap=18, surrogate=None, design=None
+):
+    """Forecast every scenario over the same horizon.
+
+    ``scenarios`` holds one row per scenario and one column per regressor to
+    override; regressors that are left out keep the last observed value, like
+    ``create_future_dataframe`` does. Returns a float32 array of shape
+    ``(n_scenarios, periods)`` and the forecast dates.
+    """
+    names = list(scenarios.columns)
+    basis = scenario_basis(model, df_prophet, periods, names, cap, surrogate, design)
+    return apply_scenarios(basis, scenarios[names].to_numpy(dtype=float)), basis["ds"]
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+MB = 1024 * 1024
+
+# Budgets can be tuned per deployment without code changes
+SESSION_BUDGET = int(os.environ.get("HYDROSIM_SESSION_BUDGET_MB", 200)) * MB
+GLOBAL_BUDGET = int(os.environ.get("HYDROSIM_GLOBAL_BUDGET_MB", 1024)) * MB
+SESSION_TTL = int(os.environ.get("HYDROSIM_SESSION_TTL", 30 * 60))
+
+
+def estimate_size(value):
+    """Approximate number of bytes held by ``value``."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(item) for item in value)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def content_hash(*values):
+    """Stable hash of DataFrames, Series, arrays and plain values."""
+    digest = hashlib.sha1()
+    for value in values:
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy())
+            if isinstance(value, pd.DataFrame):
+                digest.update(repr(list(value.columns)).encode())
+        elif isinstance(value, np.ndarray):
+            digest.update(np.ascontiguousarray(value).view(np.uint8))
+        else:
+            digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+class SessionMemoryManager:
+    """Keeps heavy, recomputable objects per session within memory budgets.
+
+    Entries are evicted least-recently-used first: within a session when it
+    exceeds ``session_budget`` and across all sessions when the total exceeds
+    ``global_budget``. Sessions that were idle longer than ``ttl`` seconds are
+    dropped entirely.
+    """
+
+    def __init__(self, session_budget=SESSION_BUDGET, global_budget=GLOBAL_BUDGET, ttl=SESSION_TTL):
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.ttl = ttl
+
+        self.total_bytes = 0
+        self.evictions = 0
+        self._sessions = {}
+        # (session_id, key) in global access order, oldest first
+        self._lru = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _session(self, session_id):
+        if session_id not in self._sessions:
+            self._sessions[session_id] = {
+                "entries": OrderedDict(),
+                "bytes": 0,
+                "last_seen": time.monotonic(),
+            }
+        session = self._sessions[session_id]
+        session["last_seen"] = time.monotonic()
+        return session
+
+    def get(self, session_id, key, default=None):
+        with self._lock:
+            session = self._session(session_id)
+            if key not in session["entries"]:
+                return default
+            session["entries"].move_to_end(key)
+            self._lru.move_to_end((session_id, key))
+            return session["entries"][key][0]
+
+    def put(self, session_id, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            self.expire_idle()
+            self._remove(session_id, key)
+
+            session = self._session(session_id)
+            session["entries"][key] = (value, size)
+            session["bytes"] += size
+            self._lru[(session_id, key)] = size
+            self.total_bytes += size
+
+            while session["bytes"] > self.session_budget and len(session["entries"]) > 1:
+                self._remove(session_id, next(iter(session["entries"])))
+                self.evictions += 1
+            while self.total_bytes > self.global_budget and len(self._lru) > 1:
+                self._remove(*next(iter(self._lru)))
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, session_id, key, compute):
+        missing = object()
+        value = self.get(session_id, key, missing)
+        if value is missing:
+            value = self.put(session_id, key, compute())
+        return value
+
+    def expire_idle(self):
+        with self._lock:
+            now = time.monotonic()
+            for session_id, session in list(self._sessions.items()):
+                if now - session["last_seen"] > self.ttl:
+                    self.discard(session_id)
+
+    def discard(self, session_id):
+        with self._lock:
+            for key in list(self._sessions.get(session_id, {}).get("entries", {})):
+                self._remove(session_id, key)
+            self._sessions.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            for session_id in list(self._sessions):
+                self.discard(session_id)
+
+    def _remove(self, session_id, key):
+        session = self._sessions.get(session_id)
+        if session is None or key not in session["entries"]:
+            return
+        _, size = session["entries"].pop(key)
+        session["bytes"] -= size
+        self.total_bytes -= size
+        del self._lru[(session_id, key)]
+
+    def stats(self, session_id=None):
+        with self._lock:
+            stats = {
+                "sessions": len(self._sessions),
+                "total_bytes": self.total_bytes,
+                "evictions": self.evictions,
+            }
+            if session_id in self._sessions:
+                stats["session_bytes"] = self._sessions[session_id]["bytes"]
+                stats["session_entries"] = len(self._sessions[session_id]["entries"])
+            return stats
+
+
+@st.cache_resource
+def get_manager():
+    """One manager shared by every session of this server process."""
+    return SessionMemoryManager()
+
+
+def current_session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "default"
+
+
+def remember(key, compute):
+    """Return the current session's value for ``key``, computing it if missing or evicted."""
+    return get_manager().get_or_compute(current_session_id(), key, compute)
+
+
+def session_stats():
+    return get_manager().stats(current_session_id())
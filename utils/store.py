@@ -0,0 +1,299 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .validation import validate_frame
+
+FEATURES = ["temperature", "humidity", "light", "pH", "EC", "TDS", "WaterTemp"]
+
+STORE_DIR = "./dataset/store"
+STORE_FILE = "store.json"
+STORE_VERSION = 2
+ARRAYS = ["timestamps", "features", "leaf_count", "hole", "site"]
+
+# Sensor logs shipped in dataset/, stored under their file name
+DATASETS = [
+    "./dataset/dataset_train_final.csv",
+    "./dataset/dataset_test_final.csv",
+    "./dataset/dummy_data_test.csv",
+    "./dataset/DataFieldFULLSIOHITest01072024.csv",
+    "./dataset/DataFieldFULLSIOHITrainFULLPattern01072024.csv",
+]
+
+
+class SensorStore:
+    """Compact, read-only sensor data for many greenhouses (sites).
+
+    Rows hold the validated readings sorted by (site, datetime, hole), so
+    every site is one contiguous slice in the time order the pages use.
+    Environmental features share a single float32 block, LeafCount and hole
+    are int16 and timestamps are int64 nanoseconds. ``frame`` wraps a site's
+    slice of these arrays in a DataFrame without copying, so any number of
+    consumers can read the same memory. ``save`` writes the arrays to disk
+    and ``open`` maps them back read-only, so processes on one host share a
+    single page-cache copy. The Forecasting page reads its example data from
+    the store in ``STORE_DIR`` when ``python -m utils.store build`` has
+    written one, and the CSV otherwise.
+    """
+
+    def __init__(self, timestamps, features, leaf_count, hole, site, sites, site_ranges=None):
+        self.timestamps = timestamps
+        self.features = features
+        self.leaf_count = leaf_count
+        self.hole = hole
+        self.site = site
+        self.sites = list(sites)
+
+        for array in (timestamps, features, leaf_count, hole, site):
+            array.flags.writeable = False
+
+        # Offset table site -> rows; saved stores bring their own so opening
+        # one never scans the arrays
+        if site_ranges is None:
+            starts = np.flatnonzero(np.r_[True, site[1:] != site[:-1]])
+            stops = np.r_[starts[1:], len(site)]
+            site_ranges = {
+                self.sites[site[start]]: (int(start), int(stop))
+                for start, stop in zip(starts, stops)
+            }
+        self.site_ranges = site_ranges
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Build a store from ``{site: DataFrame}`` with the uploaded CSV columns."""
+        sites = list(frames)
+        df = pd.concat(
+            [frame.assign(site=code) for code, frame in enumerate(frames.values())],
+            ignore_index=True,
+        )
+
+        timestamps = pd.to_datetime(df["datetime"]).to_numpy().view(np.int64)
+        hole = df["hole"].to_numpy(dtype=np.int16)
+        site = df["site"].to_numpy(dtype=np.int16)
+        # Stable, so readings of a hole at the same time keep the file order
+        order = np.lexsort((hole, timestamps, site))
+
+        return cls(
+            timestamps=timestamps[order],
+            features=np.ascontiguousarray(df[FEATURES].to_numpy(dtype=np.float32)[order]),
+            leaf_count=df["LeafCount"].to_numpy(dtype=np.int16)[order],
+            hole=hole[order],
+            site=site[order],
+            sites=sites,
+        )
+
+    @classmethod
+    def from_frame(cls, df, site="default"):
+        return cls.from_frames({site: df})
+
+    def save(self, path, sources=None):
+        """Write every array as ``.npy`` plus the offset tables as ``store.json``.
+
+        The files are written next to ``path`` and moved in place at the end,
+        so processes starting at the same time never map a half-written store.
+        """
+        tmp = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(tmp)
+        for name in ARRAYS:
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        meta = {
+            "version": STORE_VERSION,
+            "sites": self.sites,
+            "site_ranges": self.site_ranges,
+            "sources": sources or {},
+        }
+        with open(os.path.join(tmp, STORE_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            # Another process finished the same build first
+            shutil.rmtree(tmp)
+
+    @classmethod
+    def open(cls, path=STORE_DIR):
+        """Map a saved store read-only; nothing is read until a slice is used."""
+        with open(os.path.join(path, STORE_FILE)) as f:
+            meta = json.load(f)
+        if meta["version"] != STORE_VERSION:
+            raise ValueError(f"Unsupported store version {meta['version']} in {path}")
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in ARRAYS
+        }
+        site_ranges = {name: tuple(rows) for name, rows in meta["site_ranges"].items()}
+        return cls(sites=meta["sites"], site_ranges=site_ranges, **arrays)
+
+    def frame(self, site=None):
+        """Sensor data of a site in the validated upload layout, sorted by time.
+
+        The columns are views of the store's arrays, nothing is copied.
+        """
+        rows = slice(*self.site_ranges[self.sites[0] if site is None else site])
+        columns = {
+            "datetime": self.timestamps[rows].view("datetime64[ns]"),
+            "LeafCount": self.leaf_count[rows],
+            "hole": self.hole[rows],
+        }
+        for i, name in enumerate(FEATURES):
+            columns[name] = self.features[rows, i]
+        return pd.DataFrame(columns, copy=False)
+
+    def memory_usage(self):
+        """Bytes held per array, plus what the same rows take as a float64 DataFrame."""
+        usage = {
+            "timestamps": self.timestamps.nbytes,
+            "features": self.features.nbytes,
+            "leaf_count": self.leaf_count.nbytes,
+            "hole": self.hole.nbytes,
+            "site": self.site.nbytes,
+        }
+        usage["total"] = sum(usage.values())
+        # datetime, LeafCount, hole and the features as 8-byte columns
+        usage["float64_equivalent"] = len(self.timestamps) * (3 + len(FEATURES)) * 8
+        return usage
+
+
+def is_store(path):
+    return os.path.isfile(os.path.join(path, STORE_FILE))
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def read_sensor_log(path):
+    """The valid rows of a sensor CSV, checked like an upload, and the number rejected."""
+    df, report = validate_frame(pd.read_csv(path))
+    return df, len(report)
+
+
+def build_store(paths=DATASETS, output=STORE_DIR, force=False):
+    """Write the sensor logs at ``paths`` to one store, one site per file name.
+
+    Skips the build when ``output`` was already built from the same files.
+    Returns the store's sources: path, rows, rejected rows and SHA-1 of every file.
+    """
+    sources = {
+        os.path.splitext(os.path.basename(path))[0]: {"path": path, "sha1": file_digest(path)}
+        for path in paths
+    }
+    if not force and is_store(output):
+        with open(os.path.join(output, STORE_FILE)) as f:
+            meta = json.load(f)
+        built = meta["sources"]
+        if meta["version"] == STORE_VERSION and {
+            name: source["sha1"] for name, source in built.items()
+        } == {
+            name: source["sha1"] for name, source in sources.items()
+        }:
+            return built
+
+    frames = {}
+    for name, source in sources.items():
+        frames[name], source["rejected"] = read_sensor_log(source["path"])
+        source["rows"] = len(frames[name])
+    SensorStore.from_frames(frames).save(output, sources)
+    return sources
+
+
+# Run in a fresh interpreter so import caches and earlier loads do not skew the numbers
+_BENCHMARK_SCRIPT = """
+import json, sys, time
+import numpy as np
+def rss():
+    # Anonymous pages are private to this process, file pages sit in the shared page cache
+    usage = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon:", "RssFile:")):
+                usage[line.split(":")[0]] = int(line.split()[1]) * 1024
+    return usage
+from utils.store import SensorStore, read_sensor_log, DATASETS
+before = rss()
+start = time.perf_counter()
+if sys.argv[1] == "csv":
+    frames = [read_sensor_log(path)[0] for path in DATASETS]
+else:
+    store = SensorStore.open(sys.argv[2])
+    frames = [store.frame(site) for site in store.sites]
+load_s = time.perf_counter() - start
+# Touch every value, as a consumer reading the data would
+total = sum(float(frame.select_dtypes("number").to_numpy(dtype=float).sum()) for frame in frames)
+del total
+after = rss()
+print(json.dumps({"load_s": load_s, **{key: after[key] - before[key] for key in after}}))
+"""
+
+
+def benchmark(path=STORE_DIR, repeats=5):
+    """Median load time and resident memory growth of the CSV files against the mapped store.
+
+    ``private_mb`` is memory every process holds on its own, ``shared_mb``
+    pages of mapped files that all processes share.
+    """
+    rows = []
+    for source in ("csv", "store"):
+        runs = []
+        for _ in range(repeats):
+            output = subprocess.run(
+                [sys.executable, "-c", _BENCHMARK_SCRIPT, source, path],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        rows.append(
+            {
+                "source": source,
+                "load_ms": np.median([run["load_s"] for run in runs]) * 1000,
+                "private_mb": np.median([run["RssAnon"] for run in runs]) / 1024**2,
+                "shared_mb": np.median([run["RssFile"] for run in runs]) / 1024**2,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared, memory-mapped sensor store.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser(
+        "build", help="Write the sensor logs to a store that processes map read-only."
+    )
+    build_parser.add_argument("paths", nargs="*", default=DATASETS)
+    build_parser.add_argument("--output", default=STORE_DIR)
+    build_parser.add_argument("--force", action="store_true")
+
+    benchmark_parser = subparsers.add_parser(
+        "benchmark", help="Compare parsing the CSV files with opening the store."
+    )
+    benchmark_parser.add_argument("--store", default=STORE_DIR)
+    benchmark_parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        sources = build_store(args.paths, args.output, args.force)
+        for name, source in sources.items():
+            print(
+                f"{name}: {source.get('rows', '?')} rows from {source['path']} "
+                f"({source.get('rejected', 0)} invalid rows left out)"
+            )
+        print(f"Store ready in {args.output}")
+    else:
+        print(benchmark(args.store, args.repeats).round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
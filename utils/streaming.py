@@ -0,0 +1,370 @@
+import argparse
+import io
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from .anomaly import screen_anomalies
+from .model import (
+    prepare_data,
+    resample_data,
+    create_future_dataframe,
+    make_predictions,
+)
+
+# Same columns as the uploaded CSV files
+SENSOR_COLUMNS = [
+    "LeafCount",
+    "hole",
+    "temperature",
+    "humidity",
+    "light",
+    "pH",
+    "EC",
+    "TDS",
+    "WaterTemp",
+]
+
+REPLAY_PATH = "./dataset/DataFieldFULLSIOHITest01072024.csv"
+DEFAULT_PORT = 8765
+
+
+class RingBuffer:
+    """Fixed-size buffer of sensor readings, the oldest reading is overwritten first."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype="datetime64[ns]")
+        self.values = np.zeros((capacity, len(SENSOR_COLUMNS)), dtype=float)
+        self.size = 0
+        self.head = 0
+
+    def append(self, timestamp, values):
+        self.timestamps[self.head] = timestamp
+        self.values[self.head] = values
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def frame(self):
+        # Oldest reading first
+        order = (np.arange(self.size) + self.head - self.size) % self.capacity
+        df = pd.DataFrame(self.values[order], columns=SENSOR_COLUMNS)
+        df.insert(0, "datetime", self.timestamps[order])
+        return df
+
+
+class SensorStream:
+    """Ring buffer per hole plus a forecast that is refreshed as readings arrive.
+
+    The forecast reruns after every ``reforecast_every`` new readings and, if
+    ``interval`` is set, every ``interval`` seconds when new readings came in.
+    """
+
+    def __init__(self, forecaster, capacity=2000, reforecast_every=50, interval=None):
+        self.forecaster = forecaster
+        self.capacity = capacity
+        self.reforecast_every = reforecast_every
+        self.interval = interval
+
+        self.buffers = {}
+        self.received = 0
+        self.pending = 0
+        self.forecast = None
+        self.forecast_at = None
+        self.error = None
+
+        self._lock = threading.Lock()
+        self._forecasting = False
+        self._rerun = False
+
+        if interval:
+            threading.Thread(target=self._schedule, daemon=True).start()
+
+    def add(self, readings):
+        """Append one reading or a list of readings (dicts with the CSV columns)."""
+        if isinstance(readings, dict):
+            readings = [readings]
+
+        df = pd.DataFrame(readings)
+        missing = [col for col in ["datetime"] + SENSOR_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+
+        timestamps = pd.to_datetime(df["datetime"]).to_numpy()
+        values = df[SENSOR_COLUMNS].to_numpy(dtype=float)
+        holes = df["hole"].astype(int).to_numpy()
+
+        with self._lock:
+            for timestamp, row, hole in zip(timestamps, values, holes):
+                if hole not in self.buffers:
+                    self.buffers[hole] = RingBuffer(self.capacity)
+                self.buffers[hole].append(timestamp, row)
+            self.received += len(df)
+            self.pending += len(df)
+            due = self.pending >= self.reforecast_every
+
+        if due:
+            threading.Thread(target=self.refresh, daemon=True).start()
+        return len(df)
+
+    def frame(self):
+        """All buffered readings, merged across holes and sorted by time."""
+        with self._lock:
+            frames = [buffer.frame() for buffer in self.buffers.values()]
+        if not frames:
+            return None
+        df = pd.concat(frames, ignore_index=True)
+        return df.sort_values("datetime", kind="mergesort").reset_index(drop=True)
+
+    def refresh(self):
+        # A forecast already running took its frame before these readings,
+        # so ask it to run once more when it finishes
+        with self._lock:
+            if self._forecasting:
+                self._rerun = True
+                return
+            self._forecasting = True
+
+        while True:
+            with self._lock:
+                self.pending = 0
+                self._rerun = False
+            try:
+                df = self.frame()
+                if df is not None:
+                    self.forecast = self.forecaster(df)
+                    self.forecast_at = pd.Timestamp.now()
+                    self.error = None
+            except Exception as e:
+                self.error = str(e)
+            with self._lock:
+                if not self._rerun:
+                    self._forecasting = False
+                    return
+
+    def status(self):
+        with self._lock:
+            return {
+                "received": self.received,
+                "pending": self.pending,
+                "holes": {int(hole): buffer.size for hole, buffer in self.buffers.items()},
+                "forecast_at": str(self.forecast_at) if self.forecast_at else None,
+                "error": self.error,
+            }
+
+    def _schedule(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                pending = self.pending
+            if pending:
+                self.refresh()
+
+
+class StreamClient:
+    """Read-only view of a ``SensorStream`` served by another process.
+
+    Has the ``status``, ``frame`` and ``forecast`` of the stream itself, so
+    a page can show a stream whether it runs in-process or behind ``serve``.
+    """
+
+    def __init__(self, url, timeout=5):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _get(self, path):
+        with urllib.request.urlopen(self.url + path, timeout=self.timeout) as response:
+            return response.read().decode()
+
+    def _get_frame(self, path, dates):
+        body = self._get(path)
+        if body == "null":
+            return None
+        return pd.read_json(io.StringIO(body), orient="split", convert_dates=dates)
+
+    def status(self):
+        return json.loads(self._get("/status"))
+
+    def frame(self):
+        return self._get_frame("/readings", ["datetime"])
+
+    @property
+    def forecast(self):
+        return self._get_frame("/forecast", ["ds"])
+
+
+def make_forecaster(model, periods, cap=18, freq="D", anomaly_action="clip"):
+    def forecaster(df):
+        if anomaly_action:
+            df, _ = screen_anomalies(df, anomaly_action)
+        df_prophet = prepare_data(resample_data(df, freq))
+        future = create_future_dataframe(df_prophet, periods)
+        future["cap"] = cap
+        return make_predictions(model, future)
+
+    return forecaster
+
+
+def stream_from_registry(
+    periods, capacity=2000, reforecast_every=50, interval=None, registry_path=None
+):
+    """A stream forecasting with the first model of the model registry."""
+    from .registry import REGISTRY_PATH, ModelRegistry
+
+    models_registry = ModelRegistry.from_file(registry_path or REGISTRY_PATH)
+    crop, site = models_registry.keys()[0]
+    return SensorStream(
+        make_forecaster(
+            models_registry.get(crop, site),
+            periods,
+            cap=models_registry.entry(crop, site)["cap"],
+        ),
+        capacity=capacity,
+        reforecast_every=reforecast_every,
+        interval=interval,
+    )
+
+
+def _make_handler(stream):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _reply_frame(self, df):
+            body = b"null" if df is None else df.to_json(
+                orient="split", date_format="iso", index=False
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/status":
+                self._reply(200, stream.status())
+            elif self.path == "/readings":
+                self._reply_frame(stream.frame())
+            elif self.path == "/forecast":
+                self._reply_frame(stream.forecast)
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/readings":
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                accepted = stream.add(json.loads(self.rfile.read(length)))
+            except (ValueError, KeyError, TypeError) as e:
+                self._reply(400, {"error": str(e)})
+                return
+            self._reply(200, {"accepted": accepted})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(stream, host="127.0.0.1", port=DEFAULT_PORT, background=False):
+    """Accept readings as JSON on ``POST /readings``.
+
+    ``GET /status`` reports the buffer state, ``GET /readings`` and
+    ``GET /forecast`` return the buffered readings and the latest forecast
+    for a ``StreamClient``.
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(stream))
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
+
+
+def load_replay_data(path=REPLAY_PATH, start_date="2024-07-01"):
+    """Read a raw field log (``day`` + ``time`` as H.MM) into timestamped readings."""
+    df = pd.read_csv(path)
+    hours = np.floor(df["time"])
+    minutes = np.round((df["time"] - hours) * 100)
+    df["datetime"] = (
+        pd.Timestamp(start_date)
+        + pd.to_timedelta(df["day"] - 1, unit="D")
+        + pd.to_timedelta(hours, unit="h")
+        + pd.to_timedelta(minutes, unit="m")
+    )
+    return df.sort_values("datetime", kind="mergesort")[["datetime"] + SENSOR_COLUMNS]
+
+
+def replay(url, path=REPLAY_PATH, speed=3600.0, batch=1, max_sleep=1.0):
+    """Post the readings of ``path`` to ``url``, ``speed`` times faster than real time."""
+    df = load_replay_data(path)
+    df["datetime"] = df["datetime"].astype(str)
+    records = df.to_dict(orient="records")
+
+    previous = None
+    for i in range(0, len(records), batch):
+        chunk = records[i : i + batch]
+        timestamp = pd.Timestamp(chunk[0]["datetime"])
+        if previous is not None:
+            time.sleep(min((timestamp - previous).total_seconds() / speed, max_sleep))
+        previous = timestamp
+
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(chunk).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        urllib.request.urlopen(request).read()
+        print(f"\r{min(i + batch, len(records))}/{len(records)} readings", end="")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream sensor readings.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = subparsers.add_parser(
+        "replay", help="Replay a field log at accelerated speed."
+    )
+    replay_parser.add_argument("--file", default=REPLAY_PATH)
+    replay_parser.add_argument(
+        "--url", default=f"http://127.0.0.1:{DEFAULT_PORT}/readings"
+    )
+    replay_parser.add_argument("--speed", type=float, default=3600.0)
+    replay_parser.add_argument("--batch", type=int, default=1)
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Run the ingestion endpoint that the Live Monitoring page reads."
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--days", type=int, default=10, help="Forecast horizon")
+    serve_parser.add_argument("--capacity", type=int, default=2000)
+    serve_parser.add_argument("--reforecast-every", type=int, default=50)
+    serve_parser.add_argument("--interval", type=float, default=60)
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        replay(args.url, args.file, args.speed, args.batch)
+    else:
+        stream = stream_from_registry(
+            args.days, args.capacity, args.reforecast_every, args.interval
+        )
+        print(f"Accepting readings on http://{args.host}:{args.port}/readings")
+        serve(stream, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
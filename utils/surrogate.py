@@ -0,0 +1,420 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .anomaly import SENSOR_LIMITS
+from .uncertainty import point_forecast, predict_with_intervals, simulate_intervals
+from .validation import SANITY_LIMITS, START_DATE
+
+SURROGATE_DIR = "./model/surrogates"
+SURROGATE_VERSION = 1
+
+# Readings span up to MAX_DAY (40) days from planting and forecasts reach at
+# most 40 days past the last one
+GRID_DAYS = 80
+GRID_STEP_MINUTES = 10
+GRID_LEVELS = 5
+VALIDATION_POINTS = 2000
+
+# Tables measured to deviate more than this many leaves are not used
+MAX_ERROR = float(os.environ.get("HYDROSIM_SURROGATE_MAX_ERROR", 0.05))
+
+# Regressor values the table is built for: anything the screening lets through
+DESIGN_RANGES = {"hole": SANITY_LIMITS["hole"], **SENSOR_LIMITS}
+
+BENCHMARK_DATA = "./dataset/dummy_data_test.csv"
+
+ARRAYS = ["times", "base", "trend", "levels", "effects"]
+
+
+class ForecastSurrogate:
+    """Lookup table that answers point and interval forecasts of a fitted Prophet model.
+
+    ``base`` and ``trend`` hold the forecast with every regressor at its
+    reference value on a regular time grid, ``effects[j]`` the change of
+    ``yhat`` when regressor ``j`` moves to each of ``levels[j]``. A forecast
+    interpolates ``base`` at its dates and adds the interpolated effect of
+    every regressor. Additive regressors are linear in Prophet, so only the
+    interpolation of the seasonalities between grid points is approximate;
+    ``error`` holds the deviation from the real model measured at random
+    points of the grid. Intervals are drawn from the interpolated trend as
+    ``predict_with_intervals`` does. Futures with dates, caps or regressor
+    values outside the grid go to the real model, and so does everything
+    when the measured error exceeds ``max_error``.
+    """
+
+    def __init__(self, model, table, info, max_error=MAX_ERROR):
+        self.model = model
+        self.info = info
+        self.max_error = max_error
+        self.names = info["names"]
+        self.cap = info["cap"]
+        for name in ARRAYS:
+            setattr(self, name, table[name])
+        # np.interp wants float abscissae; nanoseconds since the grid start stay exact
+        self._grid = (self.times - self.times[0]).astype(float)
+
+        self.hits = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    @property
+    def error(self):
+        return self.info["error"]
+
+    def _arrays(self, future):
+        # Read once per call and column by column: selecting several columns
+        # of a frame copies them into a new one first
+        ds = future["ds"]
+        if not pd.api.types.is_datetime64_dtype(ds):
+            ds = pd.to_datetime(ds)
+        times = ds.to_numpy("datetime64[ns]").view(np.int64)
+        if any(name not in future for name in self.names):
+            return times, None, None
+        values = np.empty((len(future), len(self.names)))
+        for j, name in enumerate(self.names):
+            values[:, j] = future[name].to_numpy(dtype=float)
+        caps = future["cap"].to_numpy(dtype=float) if "cap" in future else None
+        return times, values, caps
+
+    def _covers(self, times, values, caps):
+        if self.error["max"] > self.max_error or values is None:
+            return False
+        if caps is not None and not np.allclose(caps, self.cap):
+            return False
+        if times.min() < self.times[0] or times.max() > self.times[-1]:
+            return False
+        return bool(
+            np.all(values >= self.levels[:, 0]) and np.all(values <= self.levels[:, -1])
+        )
+
+    def _point(self, times, values):
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        offsets = (times - self.times[0]).astype(float)
+
+        trend = np.interp(offsets, self._grid, self.trend)
+        yhat = np.interp(offsets, self._grid, self.base)
+        values = values[order]
+        for j in range(len(self.names)):
+            yhat += np.interp(values[:, j], self.levels[j], self.effects[j])
+        return order, times, trend, yhat
+
+    def covers(self, future):
+        """Whether every row of ``future`` lies on the grid the table was built and checked for."""
+        return self._covers(*self._arrays(future))
+
+    def point(self, future):
+        """Dates, trend and ``yhat`` of ``future`` in date order, from the table alone."""
+        times, values, _ = self._arrays(future)
+        return self._point(times, values)[1:]
+
+    def predict(self, future, uncertainty_samples=None, seed=0, design=None):
+        """Forecast with the columns of ``predict_with_intervals``, from the table when it covers ``future``."""
+        times, values, caps = self._arrays(future)
+        if not self._covers(times, values, caps):
+            with self._lock:
+                self.fallbacks += 1
+            return predict_with_intervals(
+                self.model, future, uncertainty_samples, seed, design
+            )
+        with self._lock:
+            self.hits += 1
+
+        if uncertainty_samples is None:
+            uncertainty_samples = self.model.uncertainty_samples or 0
+        order, times, trend, yhat = self._point(times, values)
+        columns = {"ds": times.view("datetime64[ns]"), "trend": trend}
+        if caps is not None:
+            columns["cap"] = np.full(len(times), self.cap)
+
+        if uncertainty_samples:
+            model = self.model
+            t = (times - model.start.value) / model.t_scale.value
+            floor = np.zeros(len(times))
+            if model.logistic_floor:
+                floor = future["floor"].to_numpy(dtype=float)[order]
+            cap_scaled = None
+            if model.growth == "logistic":
+                cap_scaled = (self.cap - floor) / model.y_scale
+            # Additive terms only, as build_surrogate checks
+            intervals = simulate_intervals(
+                model,
+                t,
+                trend,
+                0,
+                yhat - trend,
+                cap_scaled,
+                floor,
+                uncertainty_samples,
+                seed,
+            )
+            for name in intervals:
+                columns[name] = intervals[name].to_numpy()
+        else:
+            columns.update(
+                yhat_lower=yhat, yhat_upper=yhat, trend_lower=trend, trend_upper=trend
+            )
+        columns["yhat"] = yhat
+        # One frame from the arrays, no concatenation
+        return pd.DataFrame(columns)
+
+    def save(self, path):
+        """Write the table to one ``.npz`` file, atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez(
+            tmp,
+            info=np.array(json.dumps(self.info)),
+            **{name: getattr(self, name) for name in ARRAYS},
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, model, max_error=MAX_ERROR):
+        with np.load(path) as data:
+            info = json.loads(str(data["info"]))
+            if info.get("surrogate_version") != SURROGATE_VERSION:
+                raise ValueError(f"Unsupported surrogate version in {path}")
+            table = {name: data[name] for name in ARRAYS}
+        return cls(model, table, info, max_error)
+
+
+def surrogate_path(version, cap, directory=SURROGATE_DIR):
+    return os.path.join(directory, f"{version}-cap{cap:g}.npz")
+
+
+def build_surrogate(
+    model,
+    version,
+    cap,
+    start=START_DATE,
+    days=GRID_DAYS,
+    step_minutes=GRID_STEP_MINUTES,
+    levels=GRID_LEVELS,
+    ranges=None,
+    validation_points=VALIDATION_POINTS,
+    seed=0,
+):
+    """Evaluate ``model`` over the time and regressor grid and measure the table against it."""
+    names = list(model.extra_regressors)
+    modes = [term["mode"] for term in model.seasonalities.values()] + [
+        term["mode"] for term in model.extra_regressors.values()
+    ]
+    if "multiplicative" in modes:
+        raise ValueError("Only models with additive seasonalities and regressors are separable")
+    ranges = {**DESIGN_RANGES, **(ranges or {})}
+    unknown = sorted(set(names) - set(ranges))
+    if unknown:
+        raise ValueError(f"No design range for regressors: {unknown}")
+    build_start = time.perf_counter()
+
+    low = np.array([ranges[name][0] for name in names], dtype=float)
+    high = np.array([ranges[name][1] for name in names], dtype=float)
+    reference = np.clip(
+        [model.extra_regressors[name]["mu"] for name in names], low, high
+    )
+
+    start = pd.Timestamp(start)
+    times = pd.date_range(
+        start, start + pd.Timedelta(days=days), freq=f"{step_minutes}min"
+    )
+    grid = pd.DataFrame({"ds": times, **dict(zip(names, reference)), "cap": cap})
+    base = point_forecast(model, grid)
+
+    # Every regressor through its levels with the others at their reference,
+    # each row on its own grid date, so it still lines up with ``base`` after
+    # predict() has sorted the rows by date
+    level_values = np.linspace(low, high, levels).T
+    rows = np.tile(reference, (len(names) * levels, 1))
+    for j in range(len(names)):
+        rows[j * levels : (j + 1) * levels, j] = level_values[j]
+    sweep = pd.DataFrame(rows, columns=names)
+    sweep.insert(0, "ds", times[: len(rows)])
+    sweep["cap"] = cap
+    sweep_yhat = point_forecast(model, sweep)["yhat"].to_numpy()
+    effects = sweep_yhat - base["yhat"].to_numpy()[: len(rows)]
+    effects = effects.reshape(len(names), levels)
+
+    table = {
+        "times": times.to_numpy().view(np.int64),
+        "base": base["yhat"].to_numpy(),
+        "trend": base["trend"].to_numpy(),
+        "levels": level_values,
+        "effects": effects,
+    }
+    info = {
+        "surrogate_version": SURROGATE_VERSION,
+        "model_version": version,
+        "cap": float(cap),
+        "names": names,
+        "step_minutes": step_minutes,
+        "error": {"max": np.inf},
+    }
+    surrogate = ForecastSurrogate(model, table, info)
+
+    # Random regressor values on distinct dates (whole minutes, as sensor logs
+    # have them), so predict() cannot reorder rows with equal dates
+    rng = np.random.default_rng(seed)
+    minutes = rng.choice(days * 24 * 60 + 1, validation_points, replace=False)
+    check = pd.DataFrame(
+        rng.uniform(low, high, (validation_points, len(names))), columns=names
+    )
+    check.insert(0, "ds", start + pd.to_timedelta(np.sort(minutes), unit="min"))
+    check["cap"] = cap
+    expected = point_forecast(model, check)["yhat"].to_numpy()
+    errors = np.abs(surrogate.point(check)[2] - expected)
+
+    info["error"] = {
+        "max": float(errors.max()),
+        "p99": float(np.percentile(errors, 99)),
+        "rmse": float(np.sqrt(np.mean(errors**2))),
+        "points": validation_points,
+    }
+    info["build_seconds"] = round(time.perf_counter() - build_start, 3)
+    return surrogate
+
+
+def load_surrogate(model, version, cap, directory=SURROGATE_DIR, max_error=MAX_ERROR):
+    """The table built for this model version and cap, or None if there is none."""
+    path = surrogate_path(version, cap, directory)
+    if not os.path.exists(path):
+        return None
+    return ForecastSurrogate.load(path, model, max_error)
+
+
+def build_surrogates(models_registry, directory=SURROGATE_DIR, force=False, **grid):
+    """Build and save the table of every registered model that does not have one yet."""
+    rows = []
+    for crop, site in models_registry.keys():
+        entry = models_registry.entry(crop, site)
+        version = models_registry.version(crop, site)
+        path = surrogate_path(version, entry["cap"], directory)
+        if force or not os.path.exists(path):
+            surrogate = build_surrogate(
+                models_registry.get(crop, site), version, entry["cap"], **grid
+            )
+            surrogate.save(path)
+            built = True
+        else:
+            surrogate = ForecastSurrogate.load(path, None)
+            built = False
+        rows.append(
+            {
+                "crop": crop,
+                "site": site,
+                "version": version,
+                "built": built,
+                "max_error": surrogate.error["max"],
+                "rmse": surrogate.error["rmse"],
+                "build_s": surrogate.info.get("build_seconds"),
+                "path": path,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def benchmark(surrogate, future, sample_counts, repeats=5):
+    """Forecast time of the real model against the table, with the largest difference of each column."""
+    rows = []
+    for n_samples in sample_counts:
+        timings = {"model": [], "surrogate": []}
+        for _ in range(repeats):
+            start = time.perf_counter()
+            expected = predict_with_intervals(surrogate.model, future, n_samples)
+            timings["model"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            forecast = surrogate.predict(future, n_samples)
+            timings["surrogate"].append(time.perf_counter() - start)
+
+        columns = ["yhat", "yhat_lower", "yhat_upper"]
+        difference = (forecast[columns] - expected[columns]).abs().max()
+        rows.append(
+            {
+                "samples": n_samples,
+                "model_ms": np.median(timings["model"]) * 1000,
+                "surrogate_ms": np.median(timings["surrogate"]) * 1000,
+                **{f"max_diff_{col}": value for col, value in difference.items()},
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def main():
+    from .model import create_future_dataframe, prepare_data, resample_data
+    from .registry import REGISTRY_PATH, ModelRegistry
+
+    parser = argparse.ArgumentParser(
+        description="Precomputed lookup tables of the registered Prophet models."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser(
+        "build", help="Build the table of every registered model that has none yet."
+    )
+    build_parser.add_argument("--registry", default=REGISTRY_PATH)
+    build_parser.add_argument("--output", default=SURROGATE_DIR)
+    build_parser.add_argument("--start", default=START_DATE)
+    build_parser.add_argument("--days", type=int, default=GRID_DAYS)
+    build_parser.add_argument("--step-minutes", type=int, default=GRID_STEP_MINUTES)
+    build_parser.add_argument("--levels", type=int, default=GRID_LEVELS)
+    build_parser.add_argument(
+        "--validation-points", type=int, default=VALIDATION_POINTS
+    )
+    build_parser.add_argument("--force", action="store_true")
+
+    benchmark_parser = subparsers.add_parser(
+        "benchmark", help="Compare forecast time and output of the model and its table."
+    )
+    benchmark_parser.add_argument("--registry", default=REGISTRY_PATH)
+    benchmark_parser.add_argument("--surrogates", default=SURROGATE_DIR)
+    benchmark_parser.add_argument("--data", default=BENCHMARK_DATA)
+    benchmark_parser.add_argument("--periods", type=int, default=30)
+    benchmark_parser.add_argument("--samples", type=int, nargs="+", default=[0, 1000])
+    benchmark_parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    models_registry = ModelRegistry.from_file(args.registry)
+    if args.command == "build":
+        result = build_surrogates(
+            models_registry,
+            args.output,
+            args.force,
+            start=args.start,
+            days=args.days,
+            step_minutes=args.step_minutes,
+            levels=args.levels,
+            validation_points=args.validation_points,
+        )
+        print(result.to_string(index=False))
+        return
+
+    crop, site = models_registry.keys()[0]
+    entry = models_registry.entry(crop, site)
+    surrogate = load_surrogate(
+        models_registry.get(crop, site),
+        models_registry.version(crop, site),
+        entry["cap"],
+        args.surrogates,
+    )
+    if surrogate is None:
+        parser.error("No table for this model, run 'python -m utils.surrogate build'")
+
+    df = pd.read_csv(args.data, parse_dates=["datetime"])
+    future = create_future_dataframe(prepare_data(resample_data(df)), args.periods)
+    future["cap"] = entry["cap"]
+    if not surrogate.covers(future):
+        parser.error("The benchmark data lies outside the table's grid")
+    print(f"Measured error: {surrogate.error}")
+    result = benchmark(surrogate, future, args.samples, args.repeats)
+    print(result.round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from prophet import Prophet
+from threadpoolctl import threadpool_limits
+
+from .bundle import save_bundle
+from .model import REGRESSORS, prepare_data
+from .registry import REGISTRY_PATH, register_model
+from .uncertainty import point_forecast
+
+TRAIN_PATH = "./dataset/dataset_train_final.csv"
+RUNS_DIR = "./model/runs"
+CAP = 18
+
+# Per-process state of a pool worker, set up once by _init_worker
+_worker = {}
+
+
+def load_training_data(path):
+    df = pd.read_csv(path)
+    df["datetime"] = pd.to_datetime(df["datetime"])
+    return df.sort_values("datetime", kind="mergesort").reset_index(drop=True)
+
+
+def parse_grid(items):
+    """``["changepoint_prior_scale=0.05,0.5"]`` -> every combination as a list of dicts."""
+    grid = {}
+    for item in items or []:
+        name, values = item.split("=", 1)
+        grid[name] = [float(value) for value in values.split(",")]
+    return [dict(zip(grid, combo)) for combo in itertools.product(*grid.values())]
+
+
+def make_jobs(df, data_path, by="all", grid=None, crop="Selada", cap=CAP):
+    """One job per group of ``by`` ('all', 'hole' or 'site') and hyperparameter setting."""
+    if by == "all":
+        groups = [None]
+    elif by in df.columns:
+        groups = sorted(df[by].unique().tolist())
+    else:
+        raise ValueError(f"Training data has no {by!r} column")
+
+    jobs = []
+    for group, params in itertools.product(groups, grid or [{}]):
+        suffix = "".join(f"_{name}-{value:g}" for name, value in params.items())
+        name = "all" if group is None else f"{by}-{group}"
+        jobs.append(
+            {
+                "name": name + suffix,
+                "data": data_path,
+                "by": by,
+                "group": group,
+                "crop": crop,
+                "site": group if by == "site" else "default",
+                "cap": cap,
+                "params": params,
+                # Used to hand out the largest fits first
+                "rows": len(df) if group is None else int((df[by] == group).sum()),
+            }
+        )
+    return jobs
+
+
+def _init_worker(threads):
+    # Workers x threads must not exceed the cores, or BLAS/OpenMP pools fight
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    _worker["limits"] = threadpool_limits(limits=threads)
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    _worker["data"] = {}
+
+
+def fit_job(job, output_dir):
+    """Fit one model, save it as a bundle with its metadata and return the fit statistics.
+
+    Every model gets all of ``REGRESSORS``, the schema the app predicts with,
+    also when a group holds one hole or site only. Prophet leaves a constant
+    regressor unstandardized and its effect folds into the trend.
+    """
+    if "data" not in _worker:
+        _init_worker(1)
+    if job["data"] not in _worker["data"]:
+        _worker["data"][job["data"]] = load_training_data(job["data"])
+    df = _worker["data"][job["data"]]
+    if job["group"] is not None:
+        df = df[df[job["by"]] == job["group"]]
+
+    train = prepare_data(df)
+    train["cap"] = job["cap"]
+    regressors = list(REGRESSORS)
+
+    start = time.perf_counter()
+    model = Prophet(growth="logistic", **job["params"])
+    for regressor in regressors:
+        model.add_regressor(regressor)
+    model.fit(train)
+    fit_seconds = time.perf_counter() - start
+
+    # In-sample point forecast; Prophet sorts by ds so the actuals follow suit
+    fitted = point_forecast(model, train.drop(columns="y"))["yhat"].clip(lower=0)
+    errors = fitted.to_numpy() - train.sort_values("ds")["y"].to_numpy(dtype=float)
+
+    artifact = os.path.join(output_dir, job["name"])
+    save_bundle(model, artifact)
+    stats = {
+        "name": job["name"],
+        "crop": job["crop"],
+        "site": job["site"],
+        "group": job["group"],
+        "params": job["params"],
+        "regressors": regressors,
+        "cap": job["cap"],
+        "artifact": artifact,
+        "rows": len(train),
+        "start": str(train["ds"].min()),
+        "end": str(train["ds"].max()),
+        "fit_seconds": round(fit_seconds, 3),
+        "train_rmse": float(np.sqrt(np.mean(errors**2))),
+        "train_mae": float(np.mean(np.abs(errors))),
+        "sigma_obs": float(model.params["sigma_obs"].ravel()[0]),
+        "worker_pid": os.getpid(),
+    }
+    with open(os.path.join(artifact, "metadata.json"), "w") as f:
+        json.dump(stats, f, indent=2, default=str)
+    return stats
+
+
+def train_models(jobs, runs_dir=RUNS_DIR, workers=None, threads=1):
+    """Fit every job across a process pool and write them to a new versioned run directory.
+
+    Returns the run directory, one row of fit statistics per model and the
+    run manifest.
+    """
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+    digest = hashlib.sha1(json.dumps(jobs, sort_keys=True, default=str).encode())
+    version = f"{datetime.now():%Y%m%d-%H%M%S}-{digest.hexdigest()[:8]}"
+    output_dir = os.path.join(runs_dir, version)
+    os.makedirs(output_dir)
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(threads,)
+    ) as pool:
+        # Longest fits first keeps the tail of the run short
+        futures = [
+            pool.submit(fit_job, job, output_dir)
+            for job in sorted(jobs, key=lambda job: -job["rows"])
+        ]
+        for future in as_completed(futures):
+            results.append(future.result())
+    wall_seconds = time.perf_counter() - start
+
+    stats = pd.DataFrame(results).sort_values("name").reset_index(drop=True)
+    manifest = {
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "threads_per_worker": threads,
+        "wall_seconds": round(wall_seconds, 3),
+        "fit_seconds_total": round(float(stats["fit_seconds"].sum()), 3),
+        "models": stats.to_dict(orient="records"),
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    return output_dir, stats, manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fit Prophet models per hole/site/hyperparameter in parallel."
+    )
+    parser.add_argument("--data", default=TRAIN_PATH)
+    parser.add_argument("--by", default="all", help="'all', 'hole' or 'site'")
+    parser.add_argument(
+        "--grid",
+        nargs="*",
+        help="Prophet hyperparameters, e.g. changepoint_prior_scale=0.05,0.5",
+    )
+    parser.add_argument("--crop", default="Selada")
+    parser.add_argument("--cap", type=float, default=CAP)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--runs-dir", default=RUNS_DIR)
+    parser.add_argument(
+        "--register",
+        action="store_true",
+        help="Point the model registry at the new models (only for --by all/site).",
+    )
+    args = parser.parse_args()
+    if args.register and (args.by not in ("all", "site") or args.grid):
+        parser.error("--register needs one model per site (--by all/site, no --grid)")
+
+    df = load_training_data(args.data)
+    try:
+        jobs = make_jobs(
+            df, args.data, args.by, parse_grid(args.grid), args.crop, args.cap
+        )
+    except ValueError as e:
+        # e.g. --by site on data from a single greenhouse without a site column
+        parser.error(f"{e}; use --by all or --by hole for this data")
+    output_dir, stats, manifest = train_models(
+        jobs, args.runs_dir, args.workers, args.threads
+    )
+
+    columns = ["name", "rows", "fit_seconds", "train_rmse", "train_mae"]
+    print(stats[columns].round(3).to_string(index=False))
+    print(
+        f"\n{len(stats)} models in {manifest['wall_seconds']:.1f}s "
+        f"({manifest['fit_seconds_total']:.1f}s of fitting, "
+        f"{manifest['workers']} workers) -> {output_dir}"
+    )
+
+    if args.register:
+        for row in stats.itertuples():
+            register_model(row.crop, row.site, row.artifact, row.cap, REGISTRY_PATH)
+        print(f"Registered {len(stats)} models in {REGISTRY_PATH}")
+
+
+if __name__ == "__main__":
+    main()
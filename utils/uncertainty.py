@@ -0,0 +1,210 @@
+import argparse
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCHMARK_DATA = "./dataset/dummy_data_test.csv"
+
+
+def point_forecast(model, future, design=None):
+    # A DesignCache (utils.design) of the model skips rebuilding the
+    # seasonality features for dates it covers
+    if design is not None and design.covers(future):
+        return design.predict(future)
+    # Prophet skips its own interval simulation when uncertainty_samples is 0;
+    # a shallow copy keeps the shared model untouched
+    point_model = copy.copy(model)
+    point_model.uncertainty_samples = 0
+    return point_model.predict(future)
+
+
+def sample_trend(model, t, cap_scaled, n_samples, rng):
+    """Draws of the future trend in model scale, shape ``(n_samples, len(t))``.
+
+    ``t`` holds the sorted scaled times after the training history (t > 1).
+    Every step between consecutive times starts a new changepoint with
+    probability ``changepoints per unit t * step`` and a Laplace distributed
+    slope change, as in Prophet's generative model. All draws happen in one
+    batch; each path follows from cumulative sums over its changepoints.
+    """
+    k = model.params["k"].ravel()[0]
+    m = model.params["m"].ravel()[0]
+    deltas = np.ravel(model.params["delta"][0])
+    changepoints_t = np.asarray(model.changepoints_t)
+
+    steps = np.diff(np.concatenate([[1.0], t]))
+    likelihood = np.minimum(len(changepoints_t) * steps, 1)
+    mean_delta = np.mean(np.abs(deltas)) + 1e-8
+    shape = (n_samples, len(t))
+    new_deltas = (rng.random(shape) < likelihood) * rng.laplace(0, mean_delta, shape)
+
+    # Slope of every segment, and sum(changepoint * delta) which fixes its offset
+    k_t = k + deltas.sum() + new_deltas.cumsum(axis=1)
+    c_t = (changepoints_t * deltas).sum() + (new_deltas * (t - steps)).cumsum(axis=1)
+
+    if model.growth == "linear":
+        return k_t * t + (m - c_t)
+    if model.growth == "logistic":
+        # Continuity of the logistic curve gives k_i * m_i = k * m + c_i
+        m_t = (k * m + c_t) / k_t
+        return cap_scaled / (1 + np.exp(-k_t * (t - m_t)))
+    return np.full(shape, m)
+
+
+def simulate_intervals(
+    model, t, trend, multiplicative, additive, cap_scaled, floor, n_samples, seed=0
+):
+    """Interval columns from ``n_samples`` seeded draws of the future trend and observation noise.
+
+    ``trend``, ``multiplicative`` and ``additive`` are the point forecast
+    components at the scaled times ``t``; rows with ``t <= 1`` keep their
+    fitted trend.
+    """
+    rng = np.random.default_rng(seed)
+    in_future = t > 1
+
+    trend = np.tile(trend, (n_samples, 1))
+    if in_future.any():
+        trend[:, in_future] = (
+            sample_trend(
+                model,
+                t[in_future],
+                None if cap_scaled is None else cap_scaled[in_future],
+                n_samples,
+                rng,
+            )
+            * model.y_scale
+            + floor[in_future]
+        )
+
+    sigma = model.params["sigma_obs"].ravel()[0]
+    noise = rng.normal(0, sigma, trend.shape) * model.y_scale
+    yhat = trend * (1 + multiplicative) + additive + noise
+
+    lower = 100 * (1 - model.interval_width) / 2
+    upper = 100 * (1 + model.interval_width) / 2
+    yhat_bounds = np.percentile(yhat, [lower, upper], axis=0)
+    trend_bounds = np.percentile(trend, [lower, upper], axis=0)
+    return pd.DataFrame(
+        {
+            "yhat_lower": yhat_bounds[0],
+            "yhat_upper": yhat_bounds[1],
+            "trend_lower": trend_bounds[0],
+            "trend_upper": trend_bounds[1],
+        }
+    )
+
+
+def predict_with_intervals(
+    model, future, uncertainty_samples=None, seed=0, design=None
+):
+    """Prophet forecast whose intervals come from ``uncertainty_samples`` seeded draws.
+
+    ``None`` uses the model's own sample count and ``0`` returns a point
+    forecast with the interval columns equal to the point values.
+    """
+    if uncertainty_samples is None:
+        uncertainty_samples = model.uncertainty_samples or 0
+    if design is not None and not design.covers(future):
+        design = None
+    forecast = point_forecast(model, future, design)
+    base_cols = [col for col in ("ds", "trend", "cap", "floor") if col in forecast]
+
+    if not uncertainty_samples:
+        intervals = pd.DataFrame(
+            {
+                "yhat_lower": forecast["yhat"],
+                "yhat_upper": forecast["yhat"],
+                "trend_lower": forecast["trend"],
+                "trend_upper": forecast["trend"],
+            }
+        )
+        return pd.concat(
+            [forecast[base_cols], intervals, forecast.drop(columns=base_cols)], axis=1
+        )
+
+    # Same sorted frame predict() worked on, its rows line up with the forecast
+    if design is not None:
+        df = design.setup_dataframe(future)
+    else:
+        df = model.setup_dataframe(future.copy())
+    intervals = simulate_intervals(
+        model,
+        df["t"].to_numpy(),
+        forecast["trend"].to_numpy(),
+        forecast["multiplicative_terms"].to_numpy(),
+        forecast["additive_terms"].to_numpy(),
+        df["cap_scaled"].to_numpy() if "cap_scaled" in df else None,
+        df["floor"].to_numpy(),
+        uncertainty_samples,
+        seed,
+    )
+    intervals.index = forecast.index
+    return pd.concat(
+        [forecast[base_cols], intervals, forecast.drop(columns=base_cols)], axis=1
+    )
+
+
+def benchmark(model, future, sample_counts, repeats=5):
+    """Predict time per sample count, next to Prophet's own sampling as reference."""
+    reference_model = copy.copy(model)
+    reference_model.uncertainty_samples = 1000
+    np.random.seed(0)
+    reference = reference_model.predict(future)
+
+    rows = []
+    for n_samples in sample_counts:
+        prophet_model = copy.copy(model)
+        prophet_model.uncertainty_samples = n_samples
+        timings = {"prophet": [], "batched": []}
+        for _ in range(repeats):
+            start = time.perf_counter()
+            prophet_model.predict(future)
+            timings["prophet"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            forecast = predict_with_intervals(model, future, n_samples)
+            timings["batched"].append(time.perf_counter() - start)
+
+        width = (forecast["yhat_upper"] - forecast["yhat_lower"]).mean()
+        reference_width = (reference["yhat_upper"] - reference["yhat_lower"]).mean()
+        rows.append(
+            {
+                "samples": n_samples,
+                "prophet_ms": np.median(timings["prophet"]) * 1000,
+                "batched_ms": np.median(timings["batched"]) * 1000,
+                "width": width,
+                "width_vs_prophet_1000": width / reference_width,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def main():
+    from .model import load_model, prepare_data, resample_data, create_future_dataframe
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark forecast time against the number of uncertainty samples."
+    )
+    parser.add_argument("--model", default="./model/prophet_model")
+    parser.add_argument("--data", default=BENCHMARK_DATA)
+    parser.add_argument("--periods", type=int, default=40)
+    parser.add_argument("--cap", type=float, default=18)
+    parser.add_argument(
+        "--samples", type=int, nargs="+", default=[0, 100, 250, 500, 1000, 2000]
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data, parse_dates=["datetime"])
+    future = create_future_dataframe(prepare_data(resample_data(df)), args.periods)
+    future["cap"] = args.cap
+
+    result = benchmark(load_model(args.model), future, args.samples, args.repeats)
+    print(result.round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
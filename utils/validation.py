@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .anomaly import SENSOR_LIMITS
+
+MB = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get("HYDROSIM_MAX_UPLOAD_MB", 20)) * MB
+MAX_ROWS = int(os.environ.get("HYDROSIM_MAX_UPLOAD_ROWS", 200000))
+
+NUMERIC_COLUMNS = [
+    "LeafCount",
+    "hole",
+    "temperature",
+    "humidity",
+    "light",
+    "pH",
+    "EC",
+    "TDS",
+    "WaterTemp",
+]
+
+# Same shape as the optimal ranges in the model registry, but as limits of what a sensor can report
+SANITY_LIMITS = {
+    "LeafCount": (0, 1000),
+    "hole": (1, 1000),
+    "day": (1, 366),
+    **SENSOR_LIMITS,
+}
+
+START_DATE = "2024-07-01"
+
+
+class UploadError(ValueError):
+    pass
+
+
+def check_columns(columns):
+    missing = [col for col in NUMERIC_COLUMNS if col not in columns]
+    if "datetime" not in columns:
+        missing += [col for col in ("day", "time") if col not in columns]
+    if missing:
+        raise UploadError(f"Kolom berikut tidak ditemukan pada file CSV: {', '.join(missing)}")
+
+
+def read_upload(source, max_bytes=MAX_UPLOAD_BYTES, max_rows=MAX_ROWS):
+    """Read an uploaded CSV, rejecting oversized files and wrong headers before the full parse."""
+    size = getattr(source, "size", None)
+    if size is None and isinstance(source, str) and os.path.isfile(source):
+        size = os.path.getsize(source)
+    if size is not None and size > max_bytes:
+        raise UploadError(
+            f"Ukuran file {size / MB:.1f} MB melebihi batas {max_bytes / MB:.0f} MB."
+        )
+
+    try:
+        if hasattr(source, "seek"):
+            check_columns(pd.read_csv(source, nrows=0).columns)
+            source.seek(0)
+        df = pd.read_csv(source, nrows=max_rows + 1)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise UploadError(f"File CSV tidak dapat dibaca: {e}")
+
+    if len(df) > max_rows:
+        raise UploadError(f"File berisi lebih dari {max_rows} baris data.")
+    check_columns(df.columns)
+    return df
+
+
+def parse_day_time(day, time, start_date=START_DATE):
+    # 'time' is logged as H.MM, e.g. 9.19 for 09:19
+    hours = np.floor(time)
+    minutes = np.round((time - hours) * 100)
+    valid = (hours >= 0) & (hours < 24) & (minutes < 60)
+    timestamps = (
+        pd.Timestamp(start_date)
+        + pd.to_timedelta(day - 1, unit="D")
+        + pd.to_timedelta(hours, unit="h")
+        + pd.to_timedelta(minutes, unit="m")
+    )
+    return timestamps.where(valid)
+
+
+def validate_frame(df, limits=None):
+    """Check columns, types, ranges and timestamps of every row in one vectorized pass.
+
+    Returns the valid rows with a parsed ``datetime`` column and a report with
+    one line per rejected row (``baris`` is the line number in the CSV file).
+    Raises ``UploadError`` when columns are missing or no row is valid.
+    """
+    check_columns(df.columns)
+    limits = {**SANITY_LIMITS, **(limits or {})}
+    df = df.reset_index(drop=True)
+
+    columns = NUMERIC_COLUMNS + ([] if "datetime" in df.columns else ["day", "time"])
+    raw = df[columns]
+    numeric = raw.apply(pd.to_numeric, errors="coerce")
+
+    flags = {}
+    for col in columns:
+        flags[f"{col} kosong"] = raw[col].isna()
+        flags[f"{col} bukan angka"] = numeric[col].isna() & raw[col].notna()
+        if col in limits:
+            low, high = limits[col]
+            flags[f"{col} di luar {low}–{high}"] = (numeric[col] < low) | (numeric[col] > high)
+    flags["hole bukan bilangan bulat"] = numeric["hole"].notna() & (numeric["hole"] % 1 != 0)
+
+    if "datetime" in df.columns:
+        timestamps = pd.to_datetime(df["datetime"], errors="coerce")
+        flags["datetime kosong"] = df["datetime"].isna()
+        flags["datetime tidak valid"] = timestamps.isna() & df["datetime"].notna()
+    else:
+        timestamps = parse_day_time(numeric["day"], numeric["time"])
+        flags["time tidak valid"] = timestamps.isna() & numeric["time"].notna()
+
+    flags = pd.DataFrame(flags)
+    invalid = flags.any(axis=1)
+    # Join the failed checks of each rejected row without a per-row loop
+    messages = flags[invalid].dot(flags.columns + "; ").str.rstrip("; ")
+    report = pd.DataFrame({"baris": messages.index + 2, "masalah": messages.to_numpy()})
+
+    if invalid.all():
+        raise UploadError("Tidak ada baris data yang valid pada file CSV.")
+
+    valid = df.loc[~invalid].copy()
+    valid[numeric.columns] = numeric.loc[~invalid]
+    valid["hole"] = valid["hole"].astype(int)
+    valid["datetime"] = timestamps.loc[~invalid]
+    if "day" in columns:
+        valid["day"] = valid["day"].astype(int)
+        valid = valid.drop_duplicates(subset=["day", "time", "LeafCount"])
+        valid = valid.sort_values("datetime", kind="mergesort")
+    return valid, report
@@ -4,11 +4,22 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objs as go
 
+from .figure_cache import cached_figure
+
 
 def plot_forecast(forecast, periods):
-    # Calculate the number of days since the first date in the forecast
-    forecast["day"] = (forecast["ds"] - forecast["ds"].min()).dt.days + 1
+    # Calculate the number of days since the first date in the forecast, on
+    # a new frame: the forecast itself may be cached and shared
+    frame = forecast[["yhat", "yhat_lower", "yhat_upper"]].assign(
+        day=(forecast["ds"] - forecast["ds"].min()).dt.days + 1
+    )
+
+    return cached_figure(
+        _forecast_figure, frame[["day", "yhat", "yhat_lower", "yhat_upper"]], periods
+    )
+
 
+def _forecast_figure(forecast, periods):
     # Create a figure
     fig = go.Figure()
 
@@ -175,6 +186,18 @@ def calculate_growth_percentage(df, forecast):
 
 def plot_growth_bar(
     growth_percentage, last_leaf_count, max_forecasted_leaf_count, days=40
+):
+    return cached_figure(
+        _growth_bar_figure,
+        growth_percentage,
+        last_leaf_count,
+        max_forecasted_leaf_count,
+        days,
+    )
+
+
+def _growth_bar_figure(
+    growth_percentage, last_leaf_count, max_forecasted_leaf_count, days
 ):
     fig = go.Figure()
 
@@ -207,9 +230,16 @@ def plot_growth_bar(
     return fig
 
 
+def add_day_column(df):
+    # Convert datetime to 'day' since the start of data collection; frames that
+    # already number their days (e.g. SensorIndex slices) keep their numbering
+    if "day" not in df.columns:
+        df["day"] = (df["datetime"] - df["datetime"].min()).dt.days + 1
+    return df
+
+
 def visaulize_all_features(df):
-    # Convert datetime to 'day' since the start of data collection
-    df["day"] = (df["datetime"] - df["datetime"].min()).dt.days + 1
+    add_day_column(df)
 
     # List of features to visualize
     features = [
@@ -259,8 +289,7 @@ def visaulize_all_features(df):
 
 
 def visualize_feature(df, selected_feature):
-    # Convert datetime to 'day' since the start of data collection
-    df["day"] = (df["datetime"] - df["datetime"].min()).dt.days + 1
+    add_day_column(df)
 
     if selected_feature:
         # Group by 'day' and calculate the mean of the selected feature
@@ -269,33 +298,8 @@ def visualize_feature(df, selected_feature):
         # Calculate the total average of the selected feature
         total_average = daily_means[selected_feature].mean()
 
-        # Create a figure for the selected feature
-        fig = go.Figure()
-
-        # Add the mean feature data as a trace
-        fig.add_trace(
-            go.Scatter(
-                x=daily_means["day"],
-                y=daily_means[selected_feature],
-                mode="lines+markers",
-                name=selected_feature,
-                line=dict(width=2),
-            )
-        )
-
-        # Customize layout
-        fig.update_layout(
-            title=f"📈 Rata-rata '{selected_feature}' Terhadap Hari",
-            xaxis_title="Hari",
-            yaxis_title=f"Rata-rata {selected_feature}",
-            legend=dict(title="Fitur", orientation="h"),
-            hovermode="x unified",
-            xaxis=dict(
-                tickmode="linear", tick0=0, dtick=1  # Ensure x-axis shows each day
-            ),
-        )
-
         # Display the figure in Streamlit
+        fig = cached_figure(_feature_figure, daily_means, selected_feature)
         st.plotly_chart(fig, use_container_width=True)
 
         # Display additional information
@@ -310,14 +314,54 @@ def visualize_feature(df, selected_feature):
         st.write("🔍 Pilih fitur untuk divisualisasikan.")
 
 
+def _feature_figure(daily_means, selected_feature):
+    # Create a figure for the selected feature
+    fig = go.Figure()
+
+    # Add the mean feature data as a trace
+    fig.add_trace(
+        go.Scatter(
+            x=daily_means["day"],
+            y=daily_means[selected_feature],
+            mode="lines+markers",
+            name=selected_feature,
+            line=dict(width=2),
+        )
+    )
+
+    # Customize layout
+    fig.update_layout(
+        title=f"📈 Rata-rata '{selected_feature}' Terhadap Hari",
+        xaxis_title="Hari",
+        yaxis_title=f"Rata-rata {selected_feature}",
+        legend=dict(title="Fitur", orientation="h"),
+        hovermode="x unified",
+        xaxis=dict(
+            tickmode="linear", tick0=0, dtick=1  # Ensure x-axis shows each day
+        ),
+    )
+
+    return fig
+
+
 def visualize_comparison(df, feature_a, feature_b):
 
-    # Menghitung rata-rata dari setiap fitur
-    mean_feature_a = df[feature_a].mean()
-    mean_feature_b = df[feature_b].mean()
+    # Menghitung jumlah hari sejak tanggal pertama (hari pertama = 1)
+    add_day_column(df)
+
+    fig = cached_figure(
+        _comparison_figure, df["day"], df[feature_a], df[feature_b], feature_a, feature_b
+    )
+
+    # Tampilkan plot di Streamlit
+    st.plotly_chart(fig, use_container_width=True)
 
-    # Menghitung jumlah hari sejak tanggal pertama
-    df["day"] = (df["datetime"] - df["datetime"].min()).dt.days + 1  # Hari pertama = 1
+
+def _comparison_figure(day, values_a, values_b, feature_a, feature_b):
+
+    # Menghitung rata-rata dari setiap fitur
+    mean_feature_a = values_a.mean()
+    mean_feature_b = values_b.mean()
 
     # Buat figure untuk line chart
     fig = go.Figure()
@@ -325,8 +369,8 @@ def visualize_comparison(df, feature_a, feature_b):
     # Tambahkan trace untuk feature_a
     fig.add_trace(
         go.Scatter(
-            x=df["day"],
-            y=df[feature_a],
+            x=day,
+            y=values_a,
             mode="lines",
             name=f"Rata-rata {feature_a} ({mean_feature_a:.2f})",
             line=dict(color="blue"),
@@ -336,8 +380,8 @@ def visualize_comparison(df, feature_a, feature_b):
     # Tambahkan trace untuk feature_b
     fig.add_trace(
         go.Scatter(
-            x=df["day"],
-            y=df[feature_b],
+            x=day,
+            y=values_b,
             mode="lines",
             name=f"Rata-rata {feature_b} ({mean_feature_b:.2f})",
             line=dict(color="green"),
@@ -353,5 +397,33 @@ def visualize_comparison(df, feature_a, feature_b):
         template="plotly_white",
     )
 
-    # Tampilkan plot di Streamlit
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+
+def plot_scenario_heatmap(scenarios, result, feature_x, feature_y, day):
+    # Forecast of every scenario on the selected day
+    df = scenarios.copy()
+    df["yhat"] = result[:, day - 1]
+
+    # Average out any other regressor that was varied in the sweep
+    pivot = df.groupby([feature_y, feature_x])["yhat"].mean().unstack(feature_x)
+
+    fig = go.Figure(
+        data=go.Heatmap(
+            x=pivot.columns,
+            y=pivot.index,
+            z=pivot.values,
+            colorscale="Greens",
+            colorbar=dict(title="Jumlah Daun"),
+            hovertemplate=f"{feature_x}: %{{x}}<br>{feature_y}: %{{y}}<br>Jumlah Daun: %{{z:.2f}}<extra></extra>",
+        )
+    )
+
+    fig.update_layout(
+        title=f"Prediksi Jumlah Daun Hari ke-{day}: '{feature_x}' vs '{feature_y}'",
+        xaxis_title=feature_x,
+        yaxis_title=feature_y,
+        template="plotly_white",
+    )
+
+    return fig